@@ -1,16 +1,23 @@
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 import requests
-from app.utils.models import Argument
-from typing import Dict, Any, Tuple
+from app.utils.models import Argument, FactCheckResult, ParagraphFeedback
+from app.utils.deadline import invoke_llm, call_timeout, check_deadline
+from app.utils.claim_index import ClaimReviewIndex
+from app.utils.metrics import metrics
+from typing import Dict, Any, List, Optional, Tuple
+
+# Upper bound for a Google Fact Check API request, in seconds
+FACT_CHECK_API_TIMEOUT = 10
 
 class FactCheckerAgent:
-    def __init__(self, groq_api_key, google_fact_check_api_key):
+    def __init__(self, groq_api_key, google_fact_check_api_key, claim_index: Optional[ClaimReviewIndex] = None):
         self.llm = ChatGroq(
             api_key=groq_api_key,
             model_name="llama-3.1-8b-instant"
         )
         self.google_api_key = google_fact_check_api_key
+        self.claim_index = claim_index
         
         self.prompt = ChatPromptTemplate.from_template("""
         You are a fact checker agent evaluating an argument in a debate.
@@ -29,7 +36,50 @@ class FactCheckerAgent:
         If it FAILS, explain what needs to be corrected.
         """)
         
+        # Used for one paragraph of an argument that is still being written
+        self.segment_prompt = ChatPromptTemplate.from_template("""
+        You are a fact checker agent evaluating one paragraph of an argument in a debate.
+        
+        Preceding paragraphs of the argument, for context only (do not assess them):
+        {context}
+        
+        Paragraph to check: {argument}
+        
+        Google Fact Check API results: {api_results}
+        
+        Your task is to:
+        1. Identify any factual claims in the paragraph, reading it in the context above
+        2. Determine if these claims are supported by reliable evidence
+        3. Check if any claims contradict established facts
+        
+        Provide a detailed assessment of the paragraph's factual accuracy.
+        Clearly state whether the paragraph PASSES or FAILS fact checking.
+        If it FAILS, explain what needs to be corrected.
+        """)
+        
     def check_facts_with_api(self, query: str) -> Dict[str, Any]:
+        """Look up fact checks, trying the local claim-review index before the Google API"""
+        local_results = {}
+        remote_query = query
+        if self.claim_index is not None:
+            local_results, unmatched = self.claim_index.search(query)
+            if not unmatched:
+                metrics.increment("claim_index_hits")
+                return local_results
+            metrics.increment("claim_index_misses")
+            if local_results.get("claims"):
+                # Only the passages the index could not answer go to the API
+                remote_query = "\n\n".join(unmatched)
+        
+        results = self.query_remote_api(remote_query)
+        if self.claim_index is not None and results.get("claims"):
+            # Remember remote answers so repeated claims are served locally
+            self.claim_index.add_api_response(results)
+        if local_results.get("claims"):
+            results = {**results, "claims": local_results["claims"] + results.get("claims", [])}
+        return results
+        
+    def query_remote_api(self, query: str) -> Dict[str, Any]:
         """Query the Google Fact Check API"""
         base_url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
         
@@ -38,31 +88,66 @@ class FactCheckerAgent:
             "query": query
         }
         
+        check_deadline()
         try:
-            response = requests.get(base_url, params=params)
+            response = requests.get(base_url, params=params, timeout=call_timeout(FACT_CHECK_API_TIMEOUT))
             return response.json()
         except Exception as e:
             # Handle API errors gracefully
             return {"error": str(e), "claims": []}
         
-    def verify_argument(self, argument: Argument) -> Tuple[bool, str, Argument]:
-        """Verify an argument and return (is_verified, feedback, updated_argument)"""
+    def verify_text(self, text: str, context: Optional[str] = None) -> Tuple[bool, str]:
+        """Fact check argument text and return (is_verified, feedback).
+
+        With context (the argument's preceding text, possibly empty) the text
+        is checked as one paragraph of a longer argument.
+        """
         
         # Get fact check results from Google API
-        api_results = self.check_facts_with_api(argument.content)
+        api_results = self.check_facts_with_api(text)
         
         # Use LLM to evaluate factual accuracy
-        response = self.llm.invoke(
-            self.prompt.format(
-                argument=argument.content,
+        if context is None:
+            prompt = self.prompt.format(argument=text, api_results=str(api_results))
+        else:
+            prompt = self.segment_prompt.format(
+                context=context.strip() or "(this is the first paragraph)",
+                argument=text,
                 api_results=str(api_results)
             )
-        )
+        response = invoke_llm(self.llm, prompt)
         
         feedback = response.content
-        is_verified = "PASSES" in feedback
+        return "PASSES" in feedback, feedback
+        
+    def verify_argument(self, argument: Argument) -> Tuple[bool, str, Argument]:
+        """Verify an argument and return (is_verified, feedback, updated_argument)"""
+        is_verified, feedback = self.verify_text(argument.content)
         
         # Update argument verification status
         argument.verified = is_verified
         
-        return is_verified, feedback, argument
\ No newline at end of file
+        return is_verified, feedback, argument
+        
+    def combine_segment_verdicts(self,
+                                 argument: Argument,
+                                 segment_results: List[Tuple[int, bool, str]]) -> Tuple[FactCheckResult, Argument]:
+        """Merge per-paragraph (index, is_verified, feedback) results into one verdict.
+
+        The argument passes only if every paragraph passes. Otherwise the
+        failing paragraphs are flagged with their own feedback, so revision
+        can rewrite just those.
+        """
+        failed = [
+            ParagraphFeedback(index=index, feedback=feedback)
+            for index, passed, feedback in segment_results if not passed
+        ]
+        if failed:
+            metrics.increment("segment_checks_failed", len(failed))
+            feedback = "\n\n".join(f"Paragraph {item.index + 1}: {item.feedback}" for item in failed)
+        else:
+            feedback = "\n\n".join(feedback for _, _, feedback in segment_results)
+        
+        argument.verified = not failed
+        
+        return FactCheckResult(is_verified=not failed, feedback=feedback, failed_paragraphs=failed), argument
\ No newline at end of file
@@ -0,0 +1,85 @@
+import contextvars
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.agents.fact_checker import FactCheckerAgent
+from app.agents.writer import WriterAgent
+from app.utils.models import Argument, FactCheckResult
+
+# Paragraphs of one argument fact checked at the same time while it streams
+# in. Each turn gets its own pool, so concurrent debates do not queue behind
+# each other; writers produce 3-5 paragraphs.
+PIPELINE_FACT_CHECK_WORKERS = int(os.getenv("PIPELINE_FACT_CHECK_WORKERS", "5"))
+
+def create_verified_argument(writer: WriterAgent,
+                             fact_checker: FactCheckerAgent,
+                             article_summary: str,
+                             previous_arguments: List[Argument],
+                             user_input: str = "",
+                             argument_number: int = 1,
+                             evidence: Optional[List[str]] = None) -> Tuple[Argument, FactCheckResult]:
+    """Stream a new argument and fact check each paragraph as soon as it is complete.
+
+    Verification of finished paragraphs overlaps with generation of the rest,
+    so a turn costs roughly generation time plus one paragraph check instead
+    of generation plus a full-argument check. Each paragraph is checked with
+    the text before it as context. The argument passes only if every
+    paragraph passes; failing paragraphs are flagged in the result so
+    revision can target them.
+
+    The verdict is not guaranteed to match a whole-argument verify_argument
+    call: a passing argument is never checked as a whole, so a problem that
+    only shows across paragraphs can get through.
+    benchmarks/pipelined_fact_check.py measures how often the two agree.
+
+    Every paragraph makes its own claim lookup, so a turn spends one Google
+    Fact Check query per paragraph instead of one per argument, unless the
+    local claim index answers it.
+    """
+    chunks: List[str] = []
+    pending: List[Tuple[int, Future]] = []
+    buffer = ""
+    preceding = ""
+    # Paragraph position in the final content, counting empty ones
+    index = 0
+    executor = ThreadPoolExecutor(max_workers=PIPELINE_FACT_CHECK_WORKERS,
+                                  thread_name_prefix="fact-check")
+
+    def submit(segment: str) -> None:
+        nonlocal preceding, index
+        if segment.strip():
+            # Carry the request deadline into the worker thread
+            context = contextvars.copy_context()
+            pending.append((index, executor.submit(
+                context.run, fact_checker.verify_text, segment, preceding
+            )))
+            preceding += segment + "\n\n"
+        index += 1
+
+    try:
+        for chunk in writer.stream_argument(article_summary, previous_arguments, user_input, evidence):
+            chunks.append(chunk)
+            buffer += chunk
+            while "\n\n" in buffer:
+                segment, buffer = buffer.split("\n\n", 1)
+                submit(segment)
+        submit(buffer)
+
+        segment_results = []
+        for segment_index, future in pending:
+            is_verified, feedback = future.result()
+            segment_results.append((segment_index, is_verified, feedback))
+    finally:
+        # Don't start checks for a turn that has already failed
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    argument = Argument(
+        content="".join(chunks),
+        position=writer.position,
+        number=argument_number,
+        verified=False
+    )
+
+    result, argument = fact_checker.combine_segment_verdicts(argument, segment_results)
+    return argument, result
@@ -1,6 +1,7 @@
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from app.utils.models import Article
+from app.utils.deadline import invoke_llm
 
 class ReaderAgent:
     def __init__(self, api_key):
@@ -25,7 +26,8 @@ class ReaderAgent:
         
     def analyze_article(self, article: Article) -> str:
         """Analyze the article and return a structured summary"""
-        response = self.llm.invoke(
+        response = invoke_llm(
+            self.llm,
             self.prompt.format(
                 title=article.title,
                 content=article.content
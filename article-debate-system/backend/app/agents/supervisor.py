@@ -2,6 +2,7 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.schema import StrOutputParser
 from langchain_groq import ChatGroq
 from app.utils.models import DebateState, Article, Argument
+from app.utils.deadline import invoke_llm
 
 class SupervisorAgent:
     def __init__(self, api_key):
@@ -31,7 +32,8 @@ class SupervisorAgent:
         """Determine the next action in the debate"""
         task = "Determine the next step in the debate process."
         
-        response = self.llm.invoke(
+        response = invoke_llm(
+            self.llm,
             self.prompt.format(
                 article_title=state.article.title,
                 current_turn=state.current_turn,
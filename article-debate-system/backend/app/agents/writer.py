@@ -1,7 +1,10 @@
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
-from app.utils.models import Article, Argument
-from typing import List, Literal
+from app.utils.models import Article, Argument, ParagraphFeedback
+from app.utils.deadline import invoke_llm, stream_llm
+from app.utils.metrics import metrics
+from app.utils.passages import estimate_tokens
+from typing import Iterator, List, Literal, Optional
 
 class WriterAgent:
     def __init__(self, api_key, position: Literal["pro", "con"]):
@@ -27,12 +30,33 @@ class WriterAgent:
         Write a concise, well-structured argument of 3-5 paragraphs.
         """)
         
-    def create_argument(self, 
-                       article_summary: str,
-                       previous_arguments: List[Argument],
-                       user_input: str = "",
-                       argument_number: int = 1) -> Argument:
-        """Create a new argument based on the debate context"""
+        # Used instead when relevant article passages were retrieved for the turn
+        self.evidence_prompt = ChatPromptTemplate.from_template("""
+        You are a {position} writer agent in a debate about an article.
+        
+        Article Summary: {article_summary}
+        
+        Relevant Article Passages:
+        {evidence}
+        
+        Previous Arguments:
+        {previous_arguments}
+        
+        User Input: {user_input}
+        
+        Your task is to write a compelling argument {stance} the article's position.
+        Focus on facts and logical reasoning. Make specific claims that can be fact-checked.
+        Base factual claims on the article passages above where possible.
+        
+        Write a concise, well-structured argument of 3-5 paragraphs.
+        """)
+        
+    def _argument_prompt(self,
+                         article_summary: str,
+                         previous_arguments: List[Argument],
+                         user_input: str = "",
+                         evidence: Optional[List[str]] = None) -> str:
+        """Build the writer prompt from the debate context"""
         
         # Format previous arguments for context
         prev_args_text = "\n\n".join([
@@ -42,14 +66,37 @@ class WriterAgent:
         
         stance = "supporting" if self.position == "pro" else "opposing"
         
-        response = self.llm.invoke(
-            self.prompt.format(
-                position=self.position,
-                article_summary=article_summary,
-                previous_arguments=prev_args_text,
-                user_input=user_input or "No user input provided.",
-                stance=stance
+        context = {
+            "position": self.position,
+            "article_summary": article_summary,
+            "previous_arguments": prev_args_text,
+            "user_input": user_input or "No user input provided.",
+            "stance": stance
+        }
+        
+        if evidence:
+            prompt = self.evidence_prompt.format(
+                evidence="\n\n".join(f"[{i}] {passage}" for i, passage in enumerate(evidence, 1)),
+                **context
             )
+        else:
+            prompt = self.prompt.format(**context)
+        
+        metrics.increment("writer_prompts")
+        metrics.increment("writer_prompt_tokens", estimate_tokens(prompt))
+        return prompt
+        
+    def create_argument(self, 
+                       article_summary: str,
+                       previous_arguments: List[Argument],
+                       user_input: str = "",
+                       argument_number: int = 1,
+                       evidence: Optional[List[str]] = None) -> Argument:
+        """Create a new argument based on the debate context"""
+        
+        response = invoke_llm(
+            self.llm,
+            self._argument_prompt(article_summary, previous_arguments, user_input, evidence)
         )
         
         return Argument(
@@ -59,6 +106,17 @@ class WriterAgent:
             verified=False  # Will be verified by fact checker
         )
         
+    def stream_argument(self,
+                        article_summary: str,
+                        previous_arguments: List[Argument],
+                        user_input: str = "",
+                        evidence: Optional[List[str]] = None) -> Iterator[str]:
+        """Stream the text of a new argument as the model generates it"""
+        yield from stream_llm(
+            self.llm,
+            self._argument_prompt(article_summary, previous_arguments, user_input, evidence)
+        )
+        
     def revise_argument(self, argument: Argument, fact_check_feedback: str) -> Argument:
         """Revise an argument based on fact checking feedback"""
         revision_prompt = ChatPromptTemplate.from_template("""
@@ -74,7 +132,8 @@ class WriterAgent:
         Focus on accuracy while keeping your argument persuasive.
         """)
         
-        response = self.llm.invoke(
+        response = invoke_llm(
+            self.llm,
             revision_prompt.format(
                 original_argument=argument.content,
                 feedback=fact_check_feedback,
@@ -84,4 +143,39 @@ class WriterAgent:
         
         # Return revised argument with same metadata
         argument.content = response.content
-        return argument
\ No newline at end of file
+        return argument
+        
+    def revise_paragraphs(self, argument: Argument, failed_paragraphs: List[ParagraphFeedback]) -> Argument:
+        """Rewrite only the paragraphs that failed fact checking, keeping the rest as written"""
+        paragraph_prompt = ChatPromptTemplate.from_template("""
+        You need to revise one paragraph of your argument based on fact-checking feedback.
+        
+        Your full argument, for context:
+        {original_argument}
+        
+        Paragraph to revise:
+        {paragraph}
+        
+        Fact-checking feedback on this paragraph:
+        {feedback}
+        
+        Please revise this paragraph to address these issues while maintaining your {position} position.
+        Respond with the revised paragraph only.
+        """)
+        
+        paragraphs = argument.content.split("\n\n")
+        for item in failed_paragraphs:
+            response = invoke_llm(
+                self.llm,
+                paragraph_prompt.format(
+                    original_argument=argument.content,
+                    paragraph=paragraphs[item.index],
+                    feedback=item.feedback,
+                    position=self.position
+                )
+            )
+            paragraphs[item.index] = response.content.strip()
+        
+        # Return revised argument with same metadata
+        argument.content = "\n\n".join(paragraphs)
+        return argument
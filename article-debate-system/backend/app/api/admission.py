@@ -0,0 +1,164 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+# Request priorities: lower values are admitted first
+CONTINUE_DEBATE = 0
+NEW_DEBATE = 1
+
+class AdmissionController:
+    """Bounds concurrent graph executions and sheds load once the queue is full.
+
+    Continuing debates are admitted ahead of new ones. The concurrency limit
+    shrinks when LLM-calling graph nodes get slower than the target latency
+    (the LLM provider is saturated) and grows back slowly while nodes stay fast.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 max_queue: int = 16,
+                 queue_timeout: float = 10.0,
+                 target_node_latency: float = 5.0,
+                 min_concurrency: int = 1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_node_latency = target_node_latency
+
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self.queues: Dict[int, Deque[asyncio.Future]] = {CONTINUE_DEBATE: deque(), NEW_DEBATE: deque()}
+
+        # Moving averages used to adapt the limit and estimate Retry-After
+        self.node_latency: Optional[float] = None
+        self.request_seconds: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        per_request = self.request_seconds or self.target_node_latency
+        backlog = self.active + self.queued()
+        return max(1, math.ceil(backlog * per_request / max(self.limit, 1)))
+
+    def overloaded(self) -> HTTPException:
+        metrics.increment("admission_rejected")
+        return HTTPException(
+            status_code=429,
+            detail="Server is overloaded, please retry later",
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    def _grant(self) -> None:
+        """Hand free slots to queued requests, highest priority first"""
+        for priority in (CONTINUE_DEBATE, NEW_DEBATE):
+            queue = self.queues[priority]
+            while queue and self.active < int(self.limit):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self.active += 1
+                    waiter.set_result(True)
+
+    async def acquire(self, priority: int) -> None:
+        """Wait for an execution slot, raising a 429 HTTPException when overloaded"""
+        self._loop = asyncio.get_running_loop()
+
+        ahead = any(self.queues[p] for p in self.queues if p <= priority)
+        if self.active < int(self.limit) and not ahead:
+            self.active += 1
+            metrics.increment("admission_admitted")
+            return
+
+        if self.queued() >= self.max_queue:
+            if priority == CONTINUE_DEBATE and self.queues[NEW_DEBATE]:
+                # Turn away the newest new-debate waiter to make room
+                self.queues[NEW_DEBATE].pop().set_exception(self.overloaded())
+            else:
+                raise self.overloaded()
+
+        waiter = self._loop.create_future()
+        self.queues[priority].append(waiter)
+        metrics.increment("admission_waited")
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release()
+            elif waiter in self.queues[priority]:
+                self.queues[priority].remove(waiter)
+            raise
+
+        if not waiter.done():
+            self.queues[priority].remove(waiter)
+            waiter.cancel()
+            raise self.overloaded()
+
+        # Raises the 429 if this waiter was evicted
+        waiter.result()
+        metrics.increment("admission_admitted")
+
+    def release(self, duration: Optional[float] = None) -> None:
+        """Free a slot, recording how long the admitted request held it"""
+        self.active -= 1
+        if duration is not None:
+            self.request_seconds = duration if self.request_seconds is None else 0.8 * self.request_seconds + 0.2 * duration
+        self._grant()
+
+    def observe_node_latency(self, seconds: float) -> None:
+        """Adapt the concurrency limit to the latency of a node that called an LLM or remote API.
+
+        Safe to call from worker threads.
+        """
+        grew = False
+        with self._lock:
+            if self.node_latency is None:
+                self.node_latency = seconds
+            else:
+                self.node_latency = 0.8 * self.node_latency + 0.2 * seconds
+
+            now = time.monotonic()
+            if self.node_latency > self.target_node_latency:
+                # Back off at most once per latency window so one burst isn't counted twice
+                if now - self._last_decrease > self.node_latency:
+                    self.limit = max(float(self.min_concurrency), self.limit * 0.75)
+                    self._last_decrease = now
+            elif self.active >= int(self.limit) and self.limit < self.max_concurrency:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                grew = True
+
+        if grew and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._grant)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "admission_limit": self.limit,
+            "admission_active": self.active,
+            "admission_queued": self.queued(),
+            "admission_node_latency": self.node_latency or 0.0,
+        }
+
+admission_controller = AdmissionController(
+    max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "16")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+    target_node_latency=float(os.getenv("ADMISSION_TARGET_NODE_LATENCY_SECONDS", "5"))
+)
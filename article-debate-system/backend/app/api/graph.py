@@ -1,12 +1,20 @@
 from langgraph.graph import StateGraph, END
-from app.utils.models import DebateState, Argument
+from app.utils.models import DebateState, Argument, FactCheckResult
 from app.agents.supervisor import SupervisorAgent
 from app.agents.reader import ReaderAgent
 from app.agents.writer import WriterAgent
 from app.agents.fact_checker import FactCheckerAgent
+from app.agents.pipeline import create_verified_argument
+from app.utils.claim_index import ClaimReviewIndex
+from app.utils.metrics import metrics
+from app.utils.passages import PassageIndex, estimate_tokens, truncate_sections
+from app.api.admission import admission_controller
+from app.utils.deadline import check_deadline, current_deadline
+from functools import lru_cache, wraps
 import os
+import time
 from dotenv import load_dotenv
-from typing import Dict, Any, Union, TypedDict, cast, List, Tuple
+from typing import Dict, Any, Optional, Union, TypedDict, cast, List, Tuple
 
 load_dotenv()
 
@@ -14,12 +22,88 @@ load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GOOGLE_FACT_CHECK_API_KEY = os.getenv("GOOGLE_FACT_CHECK_API_KEY")
 
+# Fact check each paragraph while the writer is still streaming the argument.
+# A passing argument is not re-checked as a whole; see create_verified_argument.
+PIPELINED_FACT_CHECK = os.getenv("PIPELINED_FACT_CHECK", "false").lower() in ("1", "true", "yes")
+
+# Give writers the article passages relevant to the current turn. The summary
+# is trimmed to WRITER_SUMMARY_TOKENS, keeping the start of each of its
+# sections, and the passages fill the rest of WRITER_CONTEXT_TOKENS, so
+# summary plus passages stay within a fixed budget. Off until
+# benchmarks/passage_retrieval.py shows it saves revisions.
+PASSAGE_RETRIEVAL = os.getenv("PASSAGE_RETRIEVAL", "false").lower() in ("1", "true", "yes")
+WRITER_CONTEXT_TOKENS = int(os.getenv("WRITER_CONTEXT_TOKENS", "600"))
+WRITER_SUMMARY_TOKENS = int(os.getenv("WRITER_SUMMARY_TOKENS", "150"))
+
 # Initialize agents
 supervisor_agent = SupervisorAgent(GROQ_API_KEY)
 reader_agent = ReaderAgent(GROQ_API_KEY)
 pro_writer_agent = WriterAgent(GROQ_API_KEY, "pro")
 con_writer_agent = WriterAgent(GROQ_API_KEY, "con")
-fact_checker_agent = FactCheckerAgent(GROQ_API_KEY, GOOGLE_FACT_CHECK_API_KEY)
+# Optional local ClaimReview store consulted before the Google Fact Check API
+CLAIM_REVIEW_DB = os.getenv("CLAIM_REVIEW_DB")
+CLAIM_REVIEW_EXPORTS = os.getenv("CLAIM_REVIEW_EXPORTS")
+
+claim_index = None
+if CLAIM_REVIEW_DB:
+    claim_index = ClaimReviewIndex(CLAIM_REVIEW_DB)
+    if CLAIM_REVIEW_EXPORTS:
+        print(f"Loaded {claim_index.refresh(CLAIM_REVIEW_EXPORTS)} claim reviews from {CLAIM_REVIEW_EXPORTS}")
+
+fact_checker_agent = FactCheckerAgent(GROQ_API_KEY, GOOGLE_FACT_CHECK_API_KEY, claim_index)
+
+def interruptible(node, calls_out: bool = False):
+    """Wrap a graph node so a cancelled or timed-out request stops before it runs.
+
+    Nodes that call an LLM or remote API (calls_out) report their latency to
+    the admission controller, which uses it to adapt how many debates may run
+    at once. Bookkeeping nodes take no time and would only dilute that signal,
+    so a run is only reported when the request's deadline counted a completed
+    call during it: a pipelined fact check that reuses the generation-time
+    verdict, or a writer stopped by the iteration limit, is not.
+    """
+    @wraps(node)
+    def run(state: Any):
+        check_deadline()
+        deadline = current_deadline()
+        if not calls_out or deadline is None:
+            return node(state)
+        calls_before = deadline.calls_completed
+        start = time.perf_counter()
+        result = node(state)
+        if deadline.calls_completed > calls_before:
+            admission_controller.observe_node_latency(time.perf_counter() - start)
+        return result
+    return run
+
+@lru_cache(maxsize=128)
+def passage_index(article_content: str) -> PassageIndex:
+    """Passage index for an article, built once and reused for every turn"""
+    return PassageIndex.from_text(article_content)
+
+def writer_context(state: DebateState, user_input: str) -> Tuple[str, Optional[List[str]]]:
+    """Summary and article passages for a writer call, as (summary, evidence).
+
+    Passages are those relevant to the user's input and the argument being
+    answered. Without retrieval, or when nothing relevant is found, the full
+    summary is returned with no passages.
+    """
+    if not PASSAGE_RETRIEVAL:
+        return state.summary, None
+    
+    opposing = state.arguments[-1].content if state.arguments else ""
+    queries = [query for query in (user_input, opposing) if query]
+    if not queries:
+        # Opening argument: look for the passages behind the article's main points
+        queries = [state.summary or state.article.title]
+    
+    summary = truncate_sections(state.summary or "", WRITER_SUMMARY_TOKENS)
+    evidence = passage_index(state.article.content).retrieve(
+        queries, WRITER_CONTEXT_TOKENS - estimate_tokens(summary)
+    )
+    if not evidence:
+        return state.summary, None
+    return summary, evidence
 
 def create_debate_graph():
     """Create the debate graph with all agents"""
@@ -39,13 +123,17 @@ def create_debate_graph():
         summary = reader_agent.analyze_article(state.article)
         state.summary = summary
         
+        # Index the article for evidence retrieval while the debate starts
+        if PASSAGE_RETRIEVAL:
+            passage_index(state.article.content)
+        
         # Initialize iteration counter
         state.iteration_count = 0
             
         return state
     
     # Generate pro argument
-    def generate_pro_argument(state: Any) -> Dict:
+    def generate_pro_argument(state: Any) -> DebateState:
         # Handle input flexibility
         if not isinstance(state, DebateState):
             # If somehow we get a dict or other type
@@ -58,22 +146,39 @@ def create_debate_graph():
         if state.iteration_count >= 3:
             print(f"Ending debate in pro_argument due to iteration limit ({state.iteration_count})")
             state.is_active = False
-            return {"state": state, "argument": None}
+            state.pending_argument = None
+            return state
             
         # Get the most recent user input if available
         user_input = state.user_inputs[-1] if state.user_inputs else ""
+        summary, evidence = writer_context(state, user_input)
         
-        argument = pro_writer_agent.create_argument(
-            article_summary=state.summary,
+        if PIPELINED_FACT_CHECK:
+            argument, precheck = create_verified_argument(
+                pro_writer_agent,
+                fact_checker_agent,
+                article_summary=summary,
+                previous_arguments=state.arguments,
+                user_input=user_input,
+                argument_number=state.pro_count + 1,
+                evidence=evidence
+            )
+            state.pending_argument = argument
+            state.precheck = precheck
+            return state
+        
+        state.pending_argument = pro_writer_agent.create_argument(
+            article_summary=summary,
             previous_arguments=state.arguments,
             user_input=user_input,
-            argument_number=state.pro_count + 1
+            argument_number=state.pro_count + 1,
+            evidence=evidence
         )
         
-        return {"state": state, "argument": argument}
+        return state
     
     # Generate con argument
-    def generate_con_argument(state: Any) -> Dict:
+    def generate_con_argument(state: Any) -> DebateState:
         # Handle input flexibility
         if not isinstance(state, DebateState):
             # If somehow we get a dict or other type
@@ -86,81 +191,72 @@ def create_debate_graph():
         if state.iteration_count >= 3:
             print(f"Ending debate in con_argument due to iteration limit ({state.iteration_count})")
             state.is_active = False
-            return {"state": state, "argument": None}
+            state.pending_argument = None
+            return state
             
         # Get the most recent user input if available
         user_input = state.user_inputs[-1] if state.user_inputs else ""
+        summary, evidence = writer_context(state, user_input)
         
-        argument = con_writer_agent.create_argument(
-            article_summary=state.summary,
+        if PIPELINED_FACT_CHECK:
+            argument, precheck = create_verified_argument(
+                con_writer_agent,
+                fact_checker_agent,
+                article_summary=summary,
+                previous_arguments=state.arguments,
+                user_input=user_input,
+                argument_number=state.con_count + 1,
+                evidence=evidence
+            )
+            state.pending_argument = argument
+            state.precheck = precheck
+            return state
+        
+        state.pending_argument = con_writer_agent.create_argument(
+            article_summary=summary,
             previous_arguments=state.arguments,
             user_input=user_input,
-            argument_number=state.con_count + 1
+            argument_number=state.con_count + 1,
+            evidence=evidence
         )
         
-        return {"state": state, "argument": argument}
+        return state
     
     # Fact check argument
-    def fact_check_argument(inputs: Any) -> Dict:
-        # Handle different input types
-        if isinstance(inputs, dict) and "state" in inputs and "argument" in inputs:
-            # Normal case: dictionary with state and argument
-            state = inputs["state"]
-            argument = inputs["argument"]
-            
-            # Check if we have a null argument (from safety termination)
-            if argument is None:
-                return {
-                    "state": state, 
-                    "argument": Argument(
-                        content="Debate ended due to iteration limit",
-                        position="pro", 
-                        number=0,
-                        verified=True
-                    ),
-                    "is_verified": True, 
-                    "feedback": "Debate terminated due to safety limits"
-                }
-        elif isinstance(inputs, DebateState):
-            # Edge case: When passed directly from certain nodes
-            # Create a mock argument for testing
-            state = inputs
-            argument = Argument(
-                content="Mock argument for testing",
-                position="pro", 
-                number=1,
-                verified=False
-            )
-        else:
-            # Unexpected input format
-            raise TypeError(f"Unexpected input type for fact_check_argument: {type(inputs)}")
+    def fact_check_argument(state: Any) -> DebateState:
+        # Handle input flexibility
+        if not isinstance(state, DebateState):
+            # If somehow we get a dict or other type
+            raise TypeError(f"Expected DebateState, got {type(state)}")
         
-        is_verified, feedback, updated_argument = fact_checker_agent.verify_argument(argument)
+        # Nothing to check when the debate was ended by the safety limit
+        if state.pending_argument is None:
+            return state
         
-        return {
-            "state": state, 
-            "argument": updated_argument, 
-            "is_verified": is_verified, 
-            "feedback": feedback
-        }
+        if state.precheck is not None:
+            # Already verified paragraph by paragraph while it was generated
+            state.fact_check = state.precheck
+            state.precheck = None
+            return state
+        
+        is_verified, feedback, updated_argument = fact_checker_agent.verify_argument(state.pending_argument)
+        
+        state.pending_argument = updated_argument
+        state.fact_check = FactCheckResult(is_verified=is_verified, feedback=feedback)
+        return state
     
     # Process verified argument
-    def process_verified_argument(inputs: Any) -> DebateState:
-        # Handle different input types
-        if isinstance(inputs, dict) and "state" in inputs and "argument" in inputs:
-            # Normal case: dictionary with state and argument
-            state = inputs["state"]
-            argument = inputs["argument"]
-        elif isinstance(inputs, DebateState):
-            # Edge case: this shouldn't normally happen but just in case
-            # We can't proceed meaningfully without an argument
-            return inputs
-        else:
-            # Unexpected input format
-            raise TypeError(f"Unexpected input type for process_verified_argument: {type(inputs)}")
+    def process_verified_argument(state: Any) -> DebateState:
+        # Handle input flexibility
+        if not isinstance(state, DebateState):
+            # If somehow we get a dict or other type
+            raise TypeError(f"Expected DebateState, got {type(state)}")
+        
+        argument = state.pending_argument
         
-        # Add the argument to the state
-        state.arguments.append(argument)
+        # Add the argument to the state. Fields are reassigned rather than
+        # mutated so the graph picks them up as updates.
+        state.arguments = state.arguments + [argument]
         
         # Update the appropriate counter
         if argument.position == "pro":
@@ -171,44 +267,34 @@ def create_debate_graph():
         # Switch turns
         state.current_turn = "con" if state.current_turn == "pro" else "pro"
         
+        state.pending_argument = None
+        state.fact_check = None
         return state
     
     # Revise failed argument
-    def revise_argument(inputs: Any) -> Dict:
-        # Handle different input types
-        if isinstance(inputs, dict) and "state" in inputs and "argument" in inputs and "feedback" in inputs:
-            # Normal case with all expected keys
-            state = inputs["state"]
-            argument = inputs["argument"]
-            feedback = inputs["feedback"]
-        elif isinstance(inputs, dict) and "state" in inputs and "argument" in inputs:
-            # Partial case - missing feedback
-            state = inputs["state"]
-            argument = inputs["argument"]
-            feedback = "Please revise this argument for factual accuracy."
-        elif isinstance(inputs, DebateState):
-            # Edge case: this shouldn't normally happen
-            # We can't proceed meaningfully without an argument and feedback
-            # Return a stub response
-            return {
-                "state": inputs,
-                "argument": Argument(
-                    content="Mock revised argument for testing",
-                    position="pro", 
-                    number=1,
-                    verified=False
-                )
-            }
-        else:
-            # Unexpected input format
-            raise TypeError(f"Unexpected input type for revise_argument: {type(inputs)}")
+    def revise_argument(state: Any) -> DebateState:
+        # Handle input flexibility
+        if not isinstance(state, DebateState):
+            # If somehow we get a dict or other type
+            raise TypeError(f"Expected DebateState, got {type(state)}")
         
-        if argument.position == "pro":
-            revised_argument = pro_writer_agent.revise_argument(argument, feedback)
+        argument = state.pending_argument
+        feedback = state.fact_check.feedback if state.fact_check else "Please revise this argument for factual accuracy."
+        writer = pro_writer_agent if argument.position == "pro" else con_writer_agent
+        
+        metrics.increment("argument_revisions")
+        
+        if state.fact_check and state.fact_check.failed_paragraphs:
+            # Checked paragraph by paragraph: rewrite only the ones that failed
+            revised_argument = writer.revise_paragraphs(argument, state.fact_check.failed_paragraphs)
         else:
-            revised_argument = con_writer_agent.revise_argument(argument, feedback)
+            revised_argument = writer.revise_argument(argument, feedback)
         
-        return {"state": state, "argument": revised_argument}
+        # A revision is checked as a whole, never with the generation-time verdict
+        state.pending_argument = revised_argument
+        state.precheck = None
+        state.fact_check = None
+        return state
     
     # Wait for user input
     def wait_for_user_input(state: Any) -> DebateState:
@@ -217,7 +303,7 @@ def create_debate_graph():
             # If somehow we get a dict or other type
             raise TypeError(f"Expected DebateState, got {type(state)}")
             
-        # This is a placeholder - in the actual API, we'll pause here for user input
+        # The run ends here; the API resumes the graph when the user responds
         return state
     
     # Check debate status
@@ -236,19 +322,31 @@ def create_debate_graph():
         return state
     
     # Add nodes to the graph
-    debate_graph.add_node("analyze_article", analyze_article)
-    debate_graph.add_node("generate_pro_argument", generate_pro_argument)
-    debate_graph.add_node("generate_con_argument", generate_con_argument)
-    debate_graph.add_node("fact_check_argument", fact_check_argument)
-    debate_graph.add_node("process_verified_argument", process_verified_argument)
-    debate_graph.add_node("revise_argument", revise_argument)
-    debate_graph.add_node("wait_for_user_input", wait_for_user_input)
-    debate_graph.add_node("check_debate_status", check_debate_status)
+    debate_graph.add_node("analyze_article", interruptible(analyze_article, calls_out=True))
+    debate_graph.add_node("generate_pro_argument", interruptible(generate_pro_argument, calls_out=True))
+    debate_graph.add_node("generate_con_argument", interruptible(generate_con_argument, calls_out=True))
+    debate_graph.add_node("fact_check_argument", interruptible(fact_check_argument, calls_out=True))
+    debate_graph.add_node("process_verified_argument", interruptible(process_verified_argument))
+    debate_graph.add_node("revise_argument", interruptible(revise_argument, calls_out=True))
+    debate_graph.add_node("wait_for_user_input", interruptible(wait_for_user_input))
+    debate_graph.add_node("check_debate_status", interruptible(check_debate_status))
     
     # Define edges
     
-    # Start with article analysis
-    debate_graph.set_entry_point("analyze_article")
+    # A new debate starts with article analysis; later turns resume at the
+    # status check, which routes to whoever argues next
+    def route_entry(state: Any) -> str:
+        if isinstance(state, DebateState) and state.summary is not None:
+            return "check_debate_status"
+        return "analyze_article"
+    
+    debate_graph.set_conditional_entry_point(
+        route_entry,
+        {
+            "analyze_article": "analyze_article",
+            "check_debate_status": "check_debate_status"
+        }
+    )
     
     # After analysis, generate first pro argument
     debate_graph.add_edge("analyze_article", "generate_pro_argument")
@@ -259,32 +357,30 @@ def create_debate_graph():
     debate_graph.add_edge("revise_argument", "fact_check_argument")
     
     # Define conditional edges from fact checking
-    def route_after_fact_check(inputs: Any) -> str:
-        # Handle different input types
-        if isinstance(inputs, dict) and "is_verified" in inputs:
-            # Normal case
-            return "process_verified_argument" if inputs["is_verified"] else "revise_argument"
-        elif isinstance(inputs, DebateState):
-            # Edge case: Default to verified for testing
+    def route_after_fact_check(state: Any) -> str:
+        # Handle input flexibility
+        if not isinstance(state, DebateState) or state.pending_argument is None:
+            # The debate was ended by the safety limit before an argument was written
+            return "wait_for_user_input"
+        if state.fact_check is not None and state.fact_check.is_verified:
             return "process_verified_argument"
-        else:
-            # Fallback to revise if uncertain
-            return "revise_argument"
+        return "revise_argument"
     
     debate_graph.add_conditional_edges(
         "fact_check_argument",
         route_after_fact_check,
         {
             "process_verified_argument": "process_verified_argument",
-            "revise_argument": "revise_argument"
+            "revise_argument": "revise_argument",
+            "wait_for_user_input": "wait_for_user_input"
         }
     )
     
     # After processing a verified argument, wait for user input
     debate_graph.add_edge("process_verified_argument", "wait_for_user_input")
     
-    # After user input, check debate status
-    debate_graph.add_edge("wait_for_user_input", "check_debate_status")
+    # Each run is one turn: stop and hand the new argument to the user
+    debate_graph.add_edge("wait_for_user_input", END)
     
     # Add the conditional edges for routing after status check
     def route_after_status_check(state: Any) -> str:
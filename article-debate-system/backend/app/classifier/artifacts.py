@@ -0,0 +1,408 @@
+"""Compact, memory-mappable artifacts for the fake-news classifiers.
+
+An artifact is a directory of flat .npy arrays plus a manifest.json:
+
+    terms.npy, term_offsets.npy   sorted vocabulary as one UTF-8 blob + offsets
+    idf.npy                       TF-IDF weights
+    <model>.coef.npy              linear model weights
+    <model>.left.npy, ...         tree ensembles as concatenated node arrays
+
+Models trained on chi2-selected columns are exported with their feature
+indices mapped back to the full vocabulary, so they predict at no extra cost.
+SVD-reduced models are not supported.
+
+Every array is loaded with np.load(mmap_mode="r"), so worker processes share
+the page cache instead of each holding an unpickled vocabulary dict.
+
+Usage:
+    python -m app.classifier.artifacts export .classifier_cache/<key> artifact/
+    python -m app.classifier.artifacts bench .classifier_cache/<key> artifact/ --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_selection import SelectKBest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from app.classifier.preprocessing import wordopt
+from app.classifier.reduction import load_reducer, spec_from_slug, transformer
+
+FORMAT_VERSION = 1
+
+# Models exported by default, matching the notebook
+DEFAULT_MODELS = ["LR", "DT", "GBC", "RFC"]
+
+def _save(path: str, name: str, array: np.ndarray) -> None:
+    np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+
+def _export_trees(path: str, name: str, trees: List[Any], value_fn, columns: np.ndarray) -> None:
+    """Concatenate sklearn trees into flat node arrays with global child indices.
+
+    columns maps each feature the trees were fitted on to its vocabulary index.
+    """
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        roots.append(offset)
+        is_leaf = tree.children_left == -1
+        lefts.append(np.where(is_leaf, -1, tree.children_left + offset))
+        rights.append(np.where(is_leaf, -1, tree.children_right + offset))
+        features.append(np.where(is_leaf, 0, columns[np.maximum(tree.feature, 0)]))
+        thresholds.append(tree.threshold)
+        values.append(value_fn(tree))
+        offset += tree.node_count
+
+    _save(path, f"{name}.left", np.concatenate(lefts).astype(np.int32))
+    _save(path, f"{name}.right", np.concatenate(rights).astype(np.int32))
+    _save(path, f"{name}.feature", np.concatenate(features).astype(np.int32))
+    _save(path, f"{name}.threshold", np.concatenate(thresholds).astype(np.float64))
+    _save(path, f"{name}.value", np.concatenate(values).astype(np.float64))
+    _save(path, f"{name}.roots", np.asarray(roots, dtype=np.int32))
+
+def _positive_fraction(tree: Any) -> np.ndarray:
+    counts = tree.value[:, 0, :]
+    return counts[:, 1] / counts.sum(axis=1)
+
+def _leaf_value(tree: Any) -> np.ndarray:
+    return tree.value[:, 0, 0]
+
+def export_artifact(vectorizer: Any,
+                    models: Dict[str, Any],
+                    path: str,
+                    reducers: Optional[Dict[str, Any]] = None) -> None:
+    """Write a TfidfVectorizer and binary classifiers as a memory-mappable artifact.
+
+    reducers maps a model name to the fitted feature reducer it was trained
+    behind; only SelectKBest (chi2) reducers can be exported.
+    """
+    reducers = reducers or {}
+    if vectorizer.ngram_range != (1, 1) or vectorizer.analyzer != "word" or vectorizer.strip_accents:
+        raise ValueError("Only unigram word TfidfVectorizer without accent stripping is supported")
+
+    os.makedirs(path, exist_ok=True)
+
+    # vocabulary_ indices follow sorted term order, which matches UTF-8 byte order
+    terms = [term.encode("utf-8") for term in vectorizer.get_feature_names_out()]
+    if any(a >= b for a, b in zip(terms, terms[1:])):
+        raise ValueError("Vectorizer vocabulary is not in sorted order")
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(term) for term in terms])
+    _save(path, "terms", np.frombuffer(b"".join(terms), dtype=np.uint8))
+    _save(path, "term_offsets", offsets)
+    _save(path, "idf", vectorizer.idf_.astype(np.float64))
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "vectorizer": {
+            "lowercase": vectorizer.lowercase,
+            "token_pattern": vectorizer.token_pattern,
+            "norm": vectorizer.norm,
+            "sublinear_tf": vectorizer.sublinear_tf,
+            "n_features": len(terms),
+        },
+        "models": {},
+    }
+
+    for name, model in models.items():
+        classes = [int(c) for c in model.classes_]
+        if len(classes) != 2:
+            raise ValueError(f"{name}: only binary classifiers are supported")
+
+        reducer = reducers.get(name)
+        if reducer is None:
+            columns = np.arange(len(terms))
+        elif isinstance(reducer, SelectKBest):
+            columns = reducer.get_support(indices=True)
+        else:
+            raise ValueError(f"{name}: unsupported feature reducer {type(reducer).__name__}")
+
+        if isinstance(model, LogisticRegression):
+            coef = np.zeros(len(terms), dtype=np.float64)
+            coef[columns] = model.coef_[0]
+            _save(path, f"{name}.coef", coef)
+            entry = {"kind": "linear", "intercept": float(model.intercept_[0])}
+        elif isinstance(model, DecisionTreeClassifier):
+            _export_trees(path, name, [model.tree_], _positive_fraction, columns)
+            entry = {"kind": "forest"}
+        elif isinstance(model, RandomForestClassifier):
+            _export_trees(path, name, [est.tree_ for est in model.estimators_], _positive_fraction, columns)
+            entry = {"kind": "forest"}
+        elif isinstance(model, GradientBoostingClassifier):
+            if model.init not in (None, "zero"):
+                raise ValueError(f"{name}: custom GradientBoosting init estimators are not supported")
+            # The prior-based initial score does not depend on the features
+            zero_row = np.zeros((1, model.n_features_in_))
+            init = float(model._raw_predict_init(zero_row)[0, 0])
+            _export_trees(path, name, [est.tree_ for est in model.estimators_[:, 0]], _leaf_value, columns)
+            entry = {"kind": "boosting", "init": init, "learning_rate": float(model.learning_rate)}
+        else:
+            raise ValueError(f"{name}: unsupported model type {type(model).__name__}")
+
+        entry["classes"] = classes
+        manifest["models"][name] = entry
+
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+class ClassifierArtifact:
+    """Read-only classifier loaded from a memory-mapped artifact directory"""
+
+    def __init__(self, path: str, mmap: bool = True):
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact version {self.manifest['version']}")
+
+        mmap_mode = "r" if mmap else None
+        self._load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        settings = self.manifest["vectorizer"]
+        self.lowercase = settings["lowercase"]
+        self.token_pattern = re.compile(settings["token_pattern"])
+        self.norm = settings["norm"]
+        self.sublinear_tf = settings["sublinear_tf"]
+
+        self.terms = self._load("terms")
+        self.term_offsets = self._load("term_offsets")
+        self.idf = self._load("idf")
+        self.n_features = len(self.idf)
+
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        for name, entry in self.manifest["models"].items():
+            if entry["kind"] == "linear":
+                self._arrays[name] = {"coef": self._load(f"{name}.coef")}
+            else:
+                self._arrays[name] = {
+                    field: self._load(f"{name}.{field}")
+                    for field in ["left", "right", "feature", "threshold", "value", "roots"]
+                }
+
+    @property
+    def models(self) -> List[str]:
+        return list(self.manifest["models"])
+
+    def _term(self, i: int) -> bytes:
+        return self.terms[self.term_offsets[i]:self.term_offsets[i + 1]].tobytes()
+
+    def lookup(self, term: str) -> int:
+        """Binary search the sorted vocabulary, returning the feature index or -1"""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_features
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_features and self._term(lo) == key:
+            return lo
+        return -1
+
+    def transform(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """TF-IDF vector for already-cleaned text as sorted (indices, values)"""
+        if self.lowercase:
+            text = text.lower()
+
+        counts: Dict[int, int] = {}
+        for term, count in Counter(self.token_pattern.findall(text)).items():
+            index = self.lookup(term)
+            if index >= 0:
+                counts[index] = count
+
+        indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        values = np.array([counts[i] for i in indices], dtype=np.float64)
+        if self.sublinear_tf and len(values):
+            values = np.log(values) + 1
+        values *= self.idf[indices]
+
+        if self.norm == "l2" and len(values):
+            values /= np.sqrt(np.dot(values, values))
+        elif self.norm == "l1" and len(values):
+            values /= np.abs(values).sum()
+
+        return indices, values
+
+    def _tree_leaves(self, arrays: Dict[str, np.ndarray], indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Walk every tree of an ensemble at once, returning each tree's leaf node"""
+        left, right = arrays["left"], arrays["right"]
+        feature, threshold = arrays["feature"], arrays["threshold"]
+
+        nodes = np.array(arrays["roots"], dtype=np.int64)
+        active = left[nodes] != -1
+        while active.any():
+            current = nodes[active]
+            features = feature[current]
+
+            # Sparse lookup of each node's feature value, defaulting to 0. sklearn
+            # compares float32 feature values against the thresholds.
+            x = np.zeros(len(current), dtype=np.float32)
+            if len(indices):
+                pos = np.minimum(np.searchsorted(indices, features), len(indices) - 1)
+                found = indices[pos] == features
+                x[found] = values[pos[found]]
+
+            nodes[active] = np.where(x <= threshold[current], left[current], right[current])
+            active = left[nodes] != -1
+
+        return nodes
+
+    def predict_proba(self, text: str, model: str, clean: bool = True) -> float:
+        """Probability of the second class (1, "Not A Fake News") for one article"""
+        if clean:
+            text = wordopt(text)
+        indices, values = self.transform(text)
+
+        entry = self.manifest["models"][model]
+        arrays = self._arrays[model]
+        if entry["kind"] == "linear":
+            score = float(np.dot(arrays["coef"][indices], values)) + entry["intercept"]
+            return 1.0 / (1.0 + np.exp(-score))
+
+        leaf_values = arrays["value"][self._tree_leaves(arrays, indices, values)]
+        if entry["kind"] == "boosting":
+            score = entry["init"] + entry["learning_rate"] * float(leaf_values.sum())
+            return 1.0 / (1.0 + np.exp(-score))
+        return float(leaf_values.mean())
+
+    def predict(self, text: str, model: str, clean: bool = True) -> int:
+        """Predicted class label for one article"""
+        classes = self.manifest["models"][model]["classes"]
+        return classes[1] if self.predict_proba(text, model, clean=clean) > 0.5 else classes[0]
+
+def load_pickled(cache_path: str, models: List[str]) -> Tuple[Any, Dict[str, Any]]:
+    """Load the vectorizer and fitted models written by app.classifier.training"""
+    with open(os.path.join(cache_path, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    fitted = {}
+    for name in models:
+        with open(os.path.join(cache_path, "models", f"{name}.pkl"), "rb") as f:
+            fitted[name] = pickle.load(f)
+    return vectorizer, fitted
+
+def load_reducers(cache_path: str, models: List[str]) -> Dict[str, Any]:
+    """Fitted reducers for models whose id names a reduction, e.g. GBC__chi2-2000"""
+    reducers = {}
+    for name in models:
+        if "__" in name:
+            reducers[name] = load_reducer(cache_path, spec_from_slug(name.rsplit("__", 1)[1]))
+    return reducers
+
+def _memory_stats() -> Dict[str, int]:
+    """Rss, Pss and private memory of this process in kB (Linux only)"""
+    stats = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                stats[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_kb": stats.get("Rss", 0),
+        "pss_kb": stats.get("Pss", 0),
+        "private_kb": stats.get("Private_Clean", 0) + stats.get("Private_Dirty", 0),
+    }
+
+def _bench_worker(fmt: str, cache_path: str, artifact_path: str, models: List[str],
+                  text: str, barrier: Any, results: Any) -> None:
+    baseline = _memory_stats()
+    start = time.perf_counter()
+    if fmt == "pickle":
+        vectorizer, fitted = load_pickled(cache_path, models)
+        reducers = load_reducers(cache_path, models)
+        load_seconds = time.perf_counter() - start
+        row = vectorizer.transform([wordopt(text)])
+        for name, model in fitted.items():
+            model.predict(transformer(reducers.get(name))(row))
+    else:
+        artifact = ClassifierArtifact(artifact_path)
+        load_seconds = time.perf_counter() - start
+        for name in models:
+            artifact.predict(text, name)
+
+    # Measure while every worker is alive so shared pages are split between them
+    barrier.wait()
+    stats = _memory_stats()
+    results.put({
+        "format": fmt,
+        "load_seconds": load_seconds,
+        "rss_kb": stats["rss_kb"] - baseline["rss_kb"],
+        "pss_kb": stats["pss_kb"] - baseline["pss_kb"],
+        "private_kb": stats["private_kb"] - baseline["private_kb"],
+    })
+    barrier.wait()
+
+def compare_load(cache_path: str, artifact_path: str, models: List[str],
+                 workers: int = 4, text: str = "The senate passed the bill on Tuesday") -> List[Dict[str, Any]]:
+    """Load each format in several concurrent workers and report per-worker cost"""
+    ctx = multiprocessing.get_context("spawn")
+    summary = []
+    for fmt in ["pickle", "artifact"]:
+        barrier = ctx.Barrier(workers)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_bench_worker,
+                        args=(fmt, cache_path, artifact_path, models, text, barrier, results))
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        rows = []
+        while len(rows) < workers:
+            try:
+                rows.append(results.get(timeout=1))
+            except queue.Empty:
+                if any(proc.exitcode not in (None, 0) for proc in procs):
+                    for proc in procs:
+                        proc.terminate()
+                    raise RuntimeError(f"A {fmt} benchmark worker failed")
+        for proc in procs:
+            proc.join()
+
+        summary.append({
+            "format": fmt,
+            "workers": workers,
+            "load_seconds": float(np.median([r["load_seconds"] for r in rows])),
+            "rss_kb": int(np.median([r["rss_kb"] for r in rows])),
+            "pss_kb": int(np.median([r["pss_kb"] for r in rows])),
+            "private_kb": int(np.median([r["private_kb"] for r in rows])),
+        })
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and benchmark memory-mapped classifier artifacts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Convert cached pickles into an artifact")
+    export.add_argument("cache_path", help="Dataset directory written by app.classifier.training")
+    export.add_argument("artifact_path")
+    export.add_argument("--models", nargs="*", default=DEFAULT_MODELS)
+
+    bench = sub.add_parser("bench", help="Compare load time and memory against pickle")
+    bench.add_argument("cache_path")
+    bench.add_argument("artifact_path")
+    bench.add_argument("--models", nargs="*", default=DEFAULT_MODELS)
+    bench.add_argument("--workers", type=int, default=4)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        vectorizer, fitted = load_pickled(args.cache_path, args.models)
+        reducers = load_reducers(args.cache_path, args.models)
+        export_artifact(vectorizer, fitted, args.artifact_path, reducers)
+        print(f"Wrote artifact for {', '.join(args.models)} to {args.artifact_path}")
+    else:
+        for row in compare_load(args.cache_path, args.artifact_path, args.models, workers=args.workers):
+            print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
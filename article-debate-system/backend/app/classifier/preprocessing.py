@@ -0,0 +1,14 @@
+import re
+import string
+
+def wordopt(text: str) -> str:
+    """Normalize article text the same way the fake-news notebook does"""
+    text = text.lower()
+    text = re.sub(r'\[.*?\]', '', text)
+    text = re.sub(r"\W", " ", text)
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = re.sub(r'<.*?>+', '', text)
+    text = re.sub('[%s]' % re.escape(string.punctuation), '', text)
+    text = re.sub('\n', '', text)
+    text = re.sub(r'\w*\d\w*', '', text)
+    return text
@@ -0,0 +1,119 @@
+"""Feature reduction between TF-IDF and the classifiers.
+
+A reduction is named by a spec string:
+
+    none        the raw TF-IDF columns
+    chi2:K      the K columns with the highest chi-squared score against the label
+    svd:K       a K-component truncated SVD of the TF-IDF matrix (dense output)
+
+Reducers are fitted on the training split only and cached, together with the
+reduced train/test matrices, next to the TF-IDF cache they were fitted on.
+"""
+import os
+import pickle
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_selection import SelectKBest, chi2
+
+REDUCTION_KINDS = ("none", "chi2", "svd")
+
+def parse_reduction(spec: str) -> Tuple[str, Optional[int]]:
+    """Split a spec like "chi2:5000" into ("chi2", 5000)"""
+    kind, _, width = spec.partition(":")
+    if kind not in REDUCTION_KINDS:
+        raise ValueError(f"Unknown reduction {spec!r}; expected one of {REDUCTION_KINDS}")
+    if kind == "none":
+        if width:
+            raise ValueError(f"Reduction 'none' takes no width, got {spec!r}")
+        return kind, None
+    if not width.isdigit() or int(width) <= 0:
+        raise ValueError(f"Reduction {spec!r} needs a positive width, e.g. {kind}:1000")
+    return kind, int(width)
+
+def reduction_slug(spec: str) -> str:
+    """File-friendly form of a spec, e.g. chi2-5000"""
+    return spec.replace(":", "-")
+
+def spec_from_slug(slug: str) -> str:
+    """Inverse of reduction_slug"""
+    return slug.replace("-", ":", 1)
+
+def make_reducer(spec: str, n_features: int) -> Optional[Any]:
+    """Unfitted reducer for a spec, or None for "none" """
+    kind, width = parse_reduction(spec)
+    if kind == "none":
+        return None
+    if kind == "chi2":
+        return SelectKBest(chi2, k=min(width, n_features))
+    # TruncatedSVD needs fewer components than input columns
+    return TruncatedSVD(n_components=min(width, n_features - 1), random_state=0)
+
+def matrix_bytes(matrix: Any) -> int:
+    """Memory held by a dense or CSR feature matrix"""
+    if sparse.issparse(matrix):
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return matrix.nbytes
+
+def reduce_features(spec: str,
+                    xv_train: Any,
+                    y_train: np.ndarray,
+                    xv_test: Any,
+                    data_dir: str) -> Tuple[Optional[Any], Any, Any]:
+    """Return (reducer, xr_train, xr_test), fitting the reducer only on a cache miss"""
+    if parse_reduction(spec)[0] == "none":
+        return None, xv_train, xv_test
+
+    reducer_dir = os.path.join(data_dir, "reducers")
+    slug = reduction_slug(spec)
+    reducer_path = os.path.join(reducer_dir, f"{slug}.pkl")
+    # chi2 keeps the matrices sparse; SVD makes them dense
+    ext = "npz" if spec.startswith("chi2") else "npy"
+    train_path = os.path.join(reducer_dir, f"{slug}.train.{ext}")
+    test_path = os.path.join(reducer_dir, f"{slug}.test.{ext}")
+
+    if all(os.path.exists(path) for path in (reducer_path, train_path, test_path)):
+        with open(reducer_path, "rb") as f:
+            reducer = pickle.load(f)
+        load = sparse.load_npz if ext == "npz" else np.load
+        return reducer, load(train_path), load(test_path)
+
+    print(f"Fitting {spec} reduction...")
+    reducer = make_reducer(spec, xv_train.shape[1])
+    xr_train = reducer.fit_transform(xv_train, y_train)
+    xr_test = reducer.transform(xv_test)
+
+    os.makedirs(reducer_dir, exist_ok=True)
+    if ext == "npz":
+        sparse.save_npz(train_path, xr_train.tocsr(), compressed=False)
+        sparse.save_npz(test_path, xr_test.tocsr(), compressed=False)
+    else:
+        np.save(train_path, xr_train)
+        np.save(test_path, xr_test)
+    with open(reducer_path, "wb") as f:
+        pickle.dump(reducer, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return reducer, xr_train, xr_test
+
+def transformer(reducer: Optional[Any]) -> Callable[[Any], Any]:
+    """Function applying a fitted reducer to TF-IDF rows.
+
+    SelectKBest.transform re-sorts every chi2 score on each call, which
+    dominates single-document latency, so selection uses the column indices
+    directly.
+    """
+    if reducer is None:
+        return lambda rows: rows
+    if isinstance(reducer, SelectKBest):
+        columns = reducer.get_support(indices=True)
+        return lambda rows: rows[:, columns]
+    return reducer.transform
+
+def load_reducer(data_dir: str, spec: str) -> Optional[Any]:
+    """Fitted reducer cached by reduce_features, or None for "none" """
+    if parse_reduction(spec)[0] == "none":
+        return None
+    with open(os.path.join(data_dir, "reducers", f"{reduction_slug(spec)}.pkl"), "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,383 @@
+"""Train and compare the fake-news classifiers from fake-news-detection.ipynb.
+
+Usage:
+    python -m app.classifier.training --fake Fake.csv --true True.csv --grid sweep
+    python -m app.classifier.training --models GBC RFC \
+        --reduce GBC=none,chi2:2000,svd:300 RFC=none,chi2:2000 --max-accuracy-drop 0.005
+
+The TF-IDF matrices are cached on disk keyed by the input files and settings,
+so a re-run on unchanged data skips loading and vectorizing the text. Every
+(model, hyperparameters, reduction) candidate is fitted in its own worker
+process; see app.classifier.reduction for the reduction specs.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from app.classifier.preprocessing import wordopt
+from app.classifier.reduction import (
+    matrix_bytes, parse_reduction, reduce_features, reduction_slug, transformer
+)
+
+# Rows held back from the end of each CSV for manual testing, as in the notebook
+MANUAL_TESTING_ROWS = 10
+
+# Rows timed one at a time to estimate single-document predict latency
+SINGLE_PREDICT_SAMPLES = 50
+
+# Candidate models with the hyperparameter grids to sweep. The slow ensembles
+# are listed first so they start early and the pool drains evenly.
+GRIDS = {
+    "default": {
+        "GBC": (GradientBoostingClassifier(random_state=0), {}),
+        "RFC": (RandomForestClassifier(random_state=0), {}),
+        "DT": (DecisionTreeClassifier(), {}),
+        "LR": (LogisticRegression(), {}),
+    },
+    "sweep": {
+        "GBC": (GradientBoostingClassifier(random_state=0), {
+            "n_estimators": [100, 200],
+            "max_depth": [3, 5],
+        }),
+        "RFC": (RandomForestClassifier(random_state=0), {
+            "n_estimators": [100, 300],
+            "max_depth": [None, 50],
+        }),
+        "DT": (DecisionTreeClassifier(random_state=0), {
+            "max_depth": [None, 20, 50],
+        }),
+        "LR": (LogisticRegression(max_iter=1000), {
+            "C": [0.1, 1.0, 10.0],
+        }),
+    },
+}
+
+def _file_digest(path: str, digest: Any) -> None:
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+def dataset_key(fake_path: str, true_path: str, settings: Dict[str, Any]) -> str:
+    """Hash the raw CSVs and vectorization settings into a cache key"""
+    digest = hashlib.sha256()
+    _file_digest(fake_path, digest)
+    _file_digest(true_path, digest)
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def load_dataset(fake_path: str, true_path: str, random_state: int = 0) -> pd.DataFrame:
+    """Load, label, shuffle and clean the dataset the way the notebook does"""
+    df_fake = pd.read_csv(fake_path)
+    df_true = pd.read_csv(true_path)
+
+    df_fake["class"] = 0
+    df_true["class"] = 1
+
+    # Keep the manual testing rows out of training
+    df_fake = df_fake.iloc[:-MANUAL_TESTING_ROWS]
+    df_true = df_true.iloc[:-MANUAL_TESTING_ROWS]
+
+    df = pd.concat([df_fake, df_true], axis=0)
+    df = df.drop(["title", "subject", "date"], axis=1)
+    df = df.sample(frac=1, random_state=random_state).reset_index(drop=True)
+    df["text"] = df["text"].apply(wordopt)
+
+    return df
+
+def vectorize(fake_path: str,
+              true_path: str,
+              cache_dir: str,
+              test_size: float = 0.25,
+              random_state: int = 0) -> Tuple[Any, Any, np.ndarray, np.ndarray, str]:
+    """Return (xv_train, xv_test, y_train, y_test, key), vectorizing only on a cache miss"""
+    settings = {
+        "test_size": test_size,
+        "random_state": random_state,
+        "manual_testing_rows": MANUAL_TESTING_ROWS,
+        "vectorizer": TfidfVectorizer().get_params(),
+    }
+    key = dataset_key(fake_path, true_path, settings)
+    data_dir = os.path.join(cache_dir, key)
+    paths = {
+        name: os.path.join(data_dir, name)
+        for name in ["xv_train.npz", "xv_test.npz", "y_train.npy", "y_test.npy", "vectorizer.pkl"]
+    }
+
+    if all(os.path.exists(path) for path in paths.values()):
+        print(f"Using cached TF-IDF matrices from {data_dir}")
+        return (
+            sparse.load_npz(paths["xv_train.npz"]),
+            sparse.load_npz(paths["xv_test.npz"]),
+            np.load(paths["y_train.npy"]),
+            np.load(paths["y_test.npy"]),
+            key
+        )
+
+    print("Vectorizing dataset...")
+    df = load_dataset(fake_path, true_path, random_state=random_state)
+    x_train, x_test, y_train, y_test = train_test_split(
+        df["text"], df["class"], test_size=test_size, random_state=random_state
+    )
+
+    vectorization = TfidfVectorizer()
+    xv_train = vectorization.fit_transform(x_train).tocsr()
+    xv_test = vectorization.transform(x_test).tocsr()
+    y_train = y_train.to_numpy()
+    y_test = y_test.to_numpy()
+
+    os.makedirs(data_dir, exist_ok=True)
+    sparse.save_npz(paths["xv_train.npz"], xv_train, compressed=False)
+    sparse.save_npz(paths["xv_test.npz"], xv_test, compressed=False)
+    np.save(paths["y_train.npy"], y_train)
+    np.save(paths["y_test.npy"], y_test)
+    with open(paths["vectorizer.pkl"], "wb") as f:
+        pickle.dump(vectorization, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return xv_train, xv_test, y_train, y_test, key
+
+def candidate_id(name: str, params: Dict[str, Any], reduction: str = "none") -> str:
+    """Stable file-friendly identifier for a (model, hyperparameters, reduction) candidate"""
+    model_id = name
+    if params:
+        suffix = "_".join(f"{k}-{params[k]}" for k in sorted(params))
+        model_id = f"{name}_{suffix}"
+    if reduction != "none":
+        model_id = f"{model_id}__{reduction_slug(reduction)}"
+    return model_id
+
+def estimator_key(estimator: Any) -> str:
+    """Hash of every constructor argument, so edited GRIDS entries miss the model cache"""
+    settings = json.dumps(estimator.get_params(), sort_keys=True, default=str)
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+
+def _fit_and_evaluate(name: str,
+                      estimator: Any,
+                      params: Dict[str, Any],
+                      reduction: str,
+                      reducer: Optional[Any],
+                      xr_train: Any,
+                      y_train: np.ndarray,
+                      xv_test: Any,
+                      y_test: np.ndarray,
+                      model_dir: str,
+                      refit: bool) -> Dict[str, Any]:
+    """Fit (or load) one candidate on reduced features and measure it on the test split.
+
+    Predict timings start from the TF-IDF test rows, so they include the
+    reducer's transform and compare fairly with the unreduced candidates.
+    """
+    model_id = candidate_id(name, params, reduction)
+    model_path = os.path.join(model_dir, f"{model_id}.pkl")
+    meta_path = os.path.join(model_dir, f"{model_id}.json")
+    model = clone(estimator).set_params(**params)
+    key = estimator_key(model)
+
+    meta = {}
+    if not refit and os.path.exists(model_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    if meta.get("estimator_key") == key:
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        fit_seconds = meta["fit_seconds"]
+        cached = True
+    else:
+        start = time.perf_counter()
+        model.fit(xr_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        with open(model_path, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(meta_path, "w") as f:
+            json.dump({
+                "model": name,
+                "params": params,
+                "reduction": reduction,
+                "estimator_key": key,
+                "fit_seconds": fit_seconds
+            }, f)
+        cached = False
+
+    reduce = transformer(reducer)
+
+    def predict(rows: Any) -> np.ndarray:
+        return model.predict(reduce(rows))
+
+    start = time.perf_counter()
+    predictions = predict(xv_test)
+    batch_seconds = time.perf_counter() - start
+
+    single_rows = min(SINGLE_PREDICT_SAMPLES, xv_test.shape[0])
+    single_times = []
+    for i in range(single_rows):
+        row = xv_test[i]
+        start = time.perf_counter()
+        predict(row)
+        single_times.append(time.perf_counter() - start)
+
+    reducer_bytes = 0
+    if reducer is not None:
+        reducer_bytes = len(pickle.dumps(reducer, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return {
+        "model": name,
+        "params": json.dumps(params, sort_keys=True),
+        "reduction": reduction,
+        "n_features": xr_train.shape[1],
+        "accuracy": accuracy_score(y_test, predictions),
+        "fit_seconds": fit_seconds,
+        "predict_ms_per_doc": 1000 * batch_seconds / xv_test.shape[0],
+        "predict_ms_single": 1000 * float(np.median(single_times)) if single_times else None,
+        "model_bytes": os.path.getsize(model_path),
+        "reducer_bytes": reducer_bytes,
+        "train_matrix_bytes": matrix_bytes(xr_train),
+        "cached": cached,
+        "path": model_path,
+    }
+
+def check_models(grid: str, models: Optional[List[str]]) -> None:
+    """Raise ValueError for model names that are not in the grid"""
+    unknown = sorted(set(models or []) - set(GRIDS[grid]))
+    if unknown:
+        raise ValueError(f"Unknown models {unknown} for grid {grid!r}; expected some of {sorted(GRIDS[grid])}")
+
+def check_reductions(grid: str, models: Optional[List[str]], reductions: Dict[str, List[str]]) -> None:
+    """Raise ValueError for reductions given for models that will not be fitted"""
+    selected = set(models or GRIDS[grid])
+    unknown = sorted(set(reductions) - selected)
+    if unknown:
+        raise ValueError(f"Reductions given for models that are not selected: {unknown}; selected {sorted(selected)}")
+
+def run_sweep(fake_path: str,
+              true_path: str,
+              cache_dir: str = ".classifier_cache",
+              grid: str = "default",
+              models: Optional[List[str]] = None,
+              reductions: Optional[Dict[str, List[str]]] = None,
+              n_jobs: int = -1,
+              refit: bool = False,
+              test_size: float = 0.25,
+              random_state: int = 0) -> pd.DataFrame:
+    """Vectorize once, fit every candidate concurrently and write a comparison report.
+
+    reductions maps a model name to the reduction specs to try for it; models
+    not listed train on the raw TF-IDF columns only.
+    """
+    reductions = reductions or {}
+    check_models(grid, models)
+    check_reductions(grid, models, reductions)
+
+    xv_train, xv_test, y_train, y_test, key = vectorize(
+        fake_path, true_path, cache_dir, test_size=test_size, random_state=random_state
+    )
+    model_dir = os.path.join(cache_dir, key, "models")
+    os.makedirs(model_dir, exist_ok=True)
+
+    selected = {name: entry for name, entry in GRIDS[grid].items() if not models or name in models}
+
+    # Each reducer is fitted once and shared by every model that asks for it
+    reduced = {}
+    for name in selected:
+        for spec in reductions.get(name, ["none"]):
+            if spec not in reduced:
+                reduced[spec] = reduce_features(
+                    spec, xv_train, y_train, xv_test, os.path.join(cache_dir, key)
+                )
+
+    jobs = []
+    for name, (estimator, param_grid) in selected.items():
+        for spec in reductions.get(name, ["none"]):
+            reducer, xr_train, _ = reduced[spec]
+            for params in ParameterGrid(param_grid):
+                jobs.append(delayed(_fit_and_evaluate)(
+                    name, estimator, params, spec, reducer, xr_train, y_train,
+                    xv_test, y_test, model_dir, refit
+                ))
+
+    print(f"Evaluating {len(jobs)} candidates with n_jobs={n_jobs}...")
+    rows = Parallel(n_jobs=n_jobs)(jobs)
+
+    report = pd.DataFrame(rows).sort_values(["accuracy", "fit_seconds"], ascending=[False, True])
+    report.to_csv(os.path.join(cache_dir, key, "report.csv"), index=False)
+    report.to_json(os.path.join(cache_dir, key, "report.json"), orient="records", indent=2)
+
+    return report
+
+def recommend(report: pd.DataFrame,
+              max_accuracy_drop: float,
+              by: str = "fit_seconds") -> pd.DataFrame:
+    """Fastest candidate per model whose accuracy is within max_accuracy_drop of that model's best"""
+    picks = []
+    for _, rows in report.groupby("model", sort=False):
+        eligible = rows[rows["accuracy"] >= rows["accuracy"].max() - max_accuracy_drop]
+        picks.append(eligible.sort_values([by, "predict_ms_per_doc"]).iloc[0])
+    return pd.DataFrame(picks)
+
+def reduction_argument(value: str) -> Tuple[str, List[str]]:
+    """Parse a CLI value like "GBC=none,chi2:2000" into ("GBC", ["none", "chi2:2000"])"""
+    name, sep, specs = value.partition("=")
+    if not sep or not specs:
+        raise argparse.ArgumentTypeError(f"expected MODEL=SPEC[,SPEC...], got {value!r}")
+    try:
+        for spec in specs.split(","):
+            parse_reduction(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return name, specs.split(",")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and compare fake-news classifiers")
+    parser.add_argument("--fake", default="../input/fake-news-detection/Fake.csv")
+    parser.add_argument("--true", default="../input/fake-news-detection/True.csv")
+    parser.add_argument("--cache-dir", default=".classifier_cache")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="default")
+    parser.add_argument("--models", nargs="*", help="Subset of models to run, e.g. LR RFC")
+    parser.add_argument("--reduce", nargs="*", default=[], type=reduction_argument, metavar="MODEL=SPEC[,SPEC...]",
+                        help="Feature reductions per model, e.g. GBC=none,chi2:2000,svd:300")
+    parser.add_argument("--max-accuracy-drop", type=float,
+                        help="Also print the fastest candidate per model within this accuracy drop")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--refit", action="store_true", help="Ignore cached fitted models")
+    args = parser.parse_args()
+    try:
+        check_models(args.grid, args.models)
+        check_reductions(args.grid, args.models, dict(args.reduce))
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run_sweep(
+        args.fake,
+        args.true,
+        cache_dir=args.cache_dir,
+        grid=args.grid,
+        models=args.models,
+        reductions=dict(args.reduce),
+        n_jobs=args.n_jobs,
+        refit=args.refit
+    )
+    print(report.drop(columns=["path"]).to_string(index=False))
+
+    if args.max_accuracy_drop is not None:
+        print(f"\nFastest to fit within {args.max_accuracy_drop} accuracy of each model's best:")
+        picks = recommend(report, args.max_accuracy_drop)
+        print(picks.drop(columns=["path"]).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
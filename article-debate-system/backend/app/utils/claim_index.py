@@ -0,0 +1,291 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Words too common to help match a claim
+STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "are", "was", "were", "has", "have", "had",
+    "not", "but", "from", "they", "their", "there", "which", "will", "would", "can", "could",
+    "about", "been", "also", "its", "into", "than", "then", "these", "those", "such", "more",
+    "most", "other", "some", "any", "all", "our", "your", "his", "her", "who", "what", "when",
+    "where", "how", "why", "one", "because", "while", "however", "therefore", "argument",
+}
+
+# Longest query sent to FTS5. Arguments are several paragraphs long, so they
+# are looked up one paragraph (or run of sentences) at a time.
+MAX_QUERY_TERMS = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    review_url TEXT UNIQUE NOT NULL,
+    text TEXT NOT NULL,
+    claimant TEXT,
+    claim_date TEXT,
+    publisher_name TEXT,
+    publisher_site TEXT,
+    title TEXT,
+    review_date TEXT,
+    textual_rating TEXT,
+    language_code TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS claims_fts USING fts5(
+    text, title, content='claims', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS claims_ai AFTER INSERT ON claims BEGIN
+    INSERT INTO claims_fts(rowid, text, title) VALUES (new.id, new.text, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS claims_ad AFTER DELETE ON claims BEGIN
+    INSERT INTO claims_fts(claims_fts, rowid, text, title) VALUES ('delete', old.id, old.text, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS claims_au AFTER UPDATE ON claims BEGIN
+    INSERT INTO claims_fts(claims_fts, rowid, text, title) VALUES ('delete', old.id, old.text, old.title);
+    INSERT INTO claims_fts(rowid, text, title) VALUES (new.id, new.text, new.title);
+END;
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+COLUMNS = [
+    "review_url", "text", "claimant", "claim_date", "publisher_name", "publisher_site",
+    "title", "review_date", "textual_rating", "language_code",
+]
+
+def query_terms(text: str) -> List[str]:
+    """Distinct content words of a query, in order of first appearance"""
+    terms = []
+    seen = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) < 3 or word in STOPWORDS or word in seen:
+            continue
+        seen.add(word)
+        terms.append(word)
+    return terms
+
+def passages(text: str) -> List[Tuple[str, List[str]]]:
+    """Split text into (passage, terms) pieces of at most MAX_QUERY_TERMS terms.
+
+    Paragraphs are kept whole when they fit; longer ones are split between sentences.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        terms = query_terms(paragraph)
+        if len(terms) <= MAX_QUERY_TERMS:
+            if terms:
+                pieces.append((paragraph.strip(), terms))
+            continue
+
+        sentences, sentence_terms = [], []
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph.strip()):
+            merged = sentence_terms + [term for term in query_terms(sentence) if term not in sentence_terms]
+            if sentences and len(merged) > MAX_QUERY_TERMS:
+                pieces.append((" ".join(sentences), sentence_terms[:MAX_QUERY_TERMS]))
+                sentences, merged = [], query_terms(sentence)
+            sentences.append(sentence)
+            sentence_terms = merged
+        if sentence_terms:
+            pieces.append((" ".join(sentences), sentence_terms[:MAX_QUERY_TERMS]))
+    return pieces
+
+def _compact(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if value}
+
+def _name(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        return value.get("name")
+    if isinstance(value, list) and value:
+        return _name(value[0])
+    return value if isinstance(value, str) else None
+
+def _from_claim_review(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Row from a schema.org ClaimReview object (e.g. the Data Commons feed)"""
+    if not item.get("url") or not item.get("claimReviewed"):
+        return None
+    author = item.get("author") or {}
+    if isinstance(author, list):
+        author = author[0] if author else {}
+    reviewed = item.get("itemReviewed") or {}
+    rating = item.get("reviewRating") or {}
+    return {
+        "review_url": item["url"],
+        "text": item["claimReviewed"],
+        "claimant": _name(reviewed.get("author")),
+        "claim_date": reviewed.get("datePublished"),
+        "publisher_name": _name(author),
+        "publisher_site": author.get("url") if isinstance(author, dict) else None,
+        "title": item.get("name") or item.get("headline"),
+        "review_date": item.get("datePublished"),
+        "textual_rating": rating.get("alternateName"),
+        "language_code": item.get("inLanguage"),
+    }
+
+def _from_api_claims(claims: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Rows from Google Fact Check API "claims" entries"""
+    for claim in claims:
+        for review in claim.get("claimReview", []):
+            if not review.get("url") or not claim.get("text"):
+                continue
+            publisher = review.get("publisher") or {}
+            yield {
+                "review_url": review["url"],
+                "text": claim["text"],
+                "claimant": claim.get("claimant"),
+                "claim_date": claim.get("claimDate"),
+                "publisher_name": publisher.get("name"),
+                "publisher_site": publisher.get("site"),
+                "title": review.get("title"),
+                "review_date": review.get("reviewDate"),
+                "textual_rating": review.get("textualRating"),
+                "language_code": review.get("languageCode"),
+            }
+
+def parse_export(data: Any) -> Iterator[Dict[str, Any]]:
+    """Rows from a ClaimReview export: a DataFeed, a list of ClaimReviews, or API responses"""
+    if isinstance(data, list):
+        for item in data:
+            yield from parse_export(item)
+    elif isinstance(data, dict):
+        if "dataFeedElement" in data:
+            for element in data["dataFeedElement"]:
+                yield from parse_export(element.get("item", []))
+        elif "claims" in data:
+            yield from _from_api_claims(data["claims"])
+        else:
+            row = _from_claim_review(data)
+            if row:
+                yield row
+
+def _read_export(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield from parse_export(json.loads(line))
+        else:
+            yield from parse_export(json.load(f))
+
+class ClaimReviewIndex:
+    """Local full-text index of ClaimReview records, answered in Fact Check API shape"""
+
+    def __init__(self,
+                 path: str,
+                 min_hits: int = 1,
+                 min_term_overlap: int = 3,
+                 min_claim_coverage: float = 0.75):
+        self.path = path
+        # A passage only counts as matched when a claim shares at least
+        # min_term_overlap terms with it and the passage covers at least
+        # min_claim_coverage of that claim's terms. A long argument shares a
+        # few words with many unrelated claims, so the overlap alone is not enough.
+        self.min_hits = min_hits
+        self.min_term_overlap = min_term_overlap
+        self.min_claim_coverage = min_claim_coverage
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def add_rows(self, rows: Iterator[Dict[str, Any]]) -> int:
+        """Insert or update rows keyed by review URL, returning how many were written"""
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+        sql = (
+            f"INSERT INTO claims ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(review_url) DO UPDATE SET {updates}"
+        )
+        count = 0
+        with self._lock, self._conn:
+            for row in rows:
+                self._conn.execute(sql, [row.get(column) for column in COLUMNS])
+                count += 1
+        return count
+
+    def add_api_response(self, response: Dict[str, Any]) -> int:
+        """Keep remote Fact Check API results so the same claims are found locally next time"""
+        return self.add_rows(_from_api_claims(response.get("claims", [])))
+
+    def refresh(self, pattern: str) -> int:
+        """Load export files matching a glob, skipping files unchanged since the last refresh"""
+        written = 0
+        for path in sorted(glob.glob(pattern)):
+            stat = os.stat(path)
+            with self._lock:
+                known = self._conn.execute(
+                    "SELECT mtime, size FROM sources WHERE path = ?", (path,)
+                ).fetchone()
+            if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                continue
+
+            written += self.add_rows(_read_export(path))
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, mtime, size) VALUES (?, ?, ?)",
+                    (path, stat.st_mtime, stat.st_size)
+                )
+        return written
+
+    def _covers(self, terms: List[str], claim_text: str, claim_title: Optional[str] = None) -> bool:
+        """Whether query terms match enough of a claim to trust it without the remote API"""
+        claim_terms = set(query_terms(claim_text)) or set(query_terms(claim_title or ""))
+        if not claim_terms:
+            return False
+        shared = len(claim_terms.intersection(terms))
+        return shared >= self.min_term_overlap and shared / len(claim_terms) >= self.min_claim_coverage
+
+    def _match(self, terms: List[str], limit: int) -> List[sqlite3.Row]:
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT claims.* FROM claims_fts JOIN claims ON claims.id = claims_fts.rowid "
+                "WHERE claims_fts MATCH ? ORDER BY bm25(claims_fts) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+
+    def search(self, query: str, limit: int = 10) -> Tuple[Dict[str, Any], List[str]]:
+        """Ranked lookup returning (Fact Check API style response, unmatched passages).
+
+        Each passage of the query is matched on its own. The response holds
+        the claims some passage covers; passages without a confident match
+        are returned so the caller can look them up remotely. An empty list
+        means the index answered the whole query.
+        """
+        pieces = passages(query)
+        if not pieces:
+            return {}, [query]
+
+        rows, seen, unmatched = [], set(), []
+        for passage, terms in pieces:
+            found = self._match(terms, limit)
+            covered = [row for row in found if self._covers(terms, row["text"], row["title"])]
+            if len(found) < self.min_hits or not covered:
+                unmatched.append(passage)
+                continue
+            for row in covered:
+                if row["review_url"] not in seen:
+                    seen.add(row["review_url"])
+                    rows.append(row)
+
+        # The API omits empty fields, so leave them out here too
+        claims = [_compact({
+            "text": row["text"],
+            "claimant": row["claimant"],
+            "claimDate": row["claim_date"],
+            "claimReview": [_compact({
+                "publisher": _compact({"name": row["publisher_name"], "site": row["publisher_site"]}),
+                "url": row["review_url"],
+                "title": row["title"],
+                "reviewDate": row["review_date"],
+                "textualRating": row["textual_rating"],
+                "languageCode": row["language_code"],
+            })],
+        }) for row in rows]
+
+        return ({"claims": claims} if claims else {}), unmatched
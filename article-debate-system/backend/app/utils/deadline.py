@@ -0,0 +1,97 @@
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+class DebateCancelled(Exception):
+    """Raised inside graph work once its request is cancelled or out of time"""
+
+class Deadline:
+    """Cancellation token and time budget shared by all work for one request"""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        # LLM/HTTP calls finished on behalf of this request
+        self.calls_completed = 0
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.cancel("deadline exceeded")
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is no time limit"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise DebateCancelled(self.reason)
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("debate_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+def check_deadline() -> None:
+    """Stop the current request's work if it was cancelled or timed out"""
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check()
+
+def run_with_deadline(deadline: Deadline, fn: Callable, *args, **kwargs) -> Any:
+    """Run fn with the deadline visible to every node and agent call it makes"""
+    token = _current_deadline.set(deadline)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_deadline.reset(token)
+
+def call_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for an outgoing call: the time left on the deadline, capped by default"""
+    deadline = current_deadline()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return default
+    return remaining if default is None else min(remaining, default)
+
+def invoke_llm(llm: Any, prompt: Any) -> Any:
+    """Invoke a chat model within the current request's deadline"""
+    check_deadline()
+    kwargs: Dict[str, Any] = {}
+    timeout = call_timeout()
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    response = llm.invoke(prompt, **kwargs)
+
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.calls_completed += 1
+        # Don't hand a late result to the next step if the client has gone
+        deadline.check()
+    return response
+
+def stream_llm(llm: Any, prompt: Any) -> Iterator[str]:
+    """Stream a chat model's text within the current request's deadline"""
+    check_deadline()
+    kwargs: Dict[str, Any] = {}
+    timeout = call_timeout()
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    for chunk in llm.stream(prompt, **kwargs):
+        check_deadline()
+        yield chunk.content
+
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.calls_completed += 1
@@ -0,0 +1,19 @@
+import threading
+from typing import Dict
+
+class Counters:
+    """Thread-safe named counters exposed on the /metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+metrics = Counters()
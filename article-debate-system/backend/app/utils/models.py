@@ -12,6 +12,18 @@ class Argument(BaseModel):
     number: int
     verified: bool = False
 
+class ParagraphFeedback(BaseModel):
+    # Position in argument.content.split("\n\n")
+    index: int
+    feedback: str
+
+class FactCheckResult(BaseModel):
+    is_verified: bool
+    feedback: str
+    # Paragraphs that failed a per-paragraph check; revision rewrites only
+    # these. Empty when the argument was checked as a whole.
+    failed_paragraphs: List[ParagraphFeedback] = []
+
 class DebateState(BaseModel):
     article: Article
     summary: Optional[str] = None
@@ -21,4 +33,9 @@ class DebateState(BaseModel):
     con_count: int = 0
     user_inputs: List[str] = []
     is_active: bool = True
-    iteration_count: int = 0 
\ No newline at end of file
+    iteration_count: int = 0
+    # Hand-off between graph nodes within one turn
+    pending_argument: Optional[Argument] = None
+    # Verdict reached while the argument was generated (pipelined fact checking)
+    precheck: Optional[FactCheckResult] = None
+    fact_check: Optional[FactCheckResult] = None
@@ -0,0 +1,136 @@
+import math
+import re
+from typing import Dict, List
+
+import numpy as np
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Leading whole sentences of text that fit in max_tokens, or leading words if none do"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        candidate = f"{kept} {sentence}".strip()
+        if estimate_tokens(candidate) > max_tokens:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    words = []
+    for word in text.split():
+        if estimate_tokens(" ".join(words + [word])) > max_tokens:
+            break
+        words.append(word)
+    return " ".join(words)
+
+def truncate_sections(text: str, max_tokens: int) -> str:
+    """Trim each blank-line separated section of text so every section keeps its opening.
+
+    Sections shorter than an even share of max_tokens are kept whole and the
+    share they leave unused goes to the longer ones.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sections = [section.strip() for section in re.split(r"\n\s*\n", text) if section.strip()]
+    # One token per blank line between sections
+    remaining = max_tokens - (len(sections) - 1)
+    shares: Dict[int, int] = {}
+    by_length = sorted(range(len(sections)), key=lambda i: estimate_tokens(sections[i]))
+    for position, i in enumerate(by_length):
+        shares[i] = min(remaining // (len(sections) - position), estimate_tokens(sections[i]))
+        remaining -= shares[i]
+    trimmed = [truncate_to_tokens(section, shares[i]) for i, section in enumerate(sections)]
+    return "\n\n".join(section for section in trimmed if section)
+
+def split_passages(text: str, max_words: int = 120) -> List[str]:
+    """Split an article into paragraph-sized passages of at most max_words words"""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if len(paragraphs) <= 1:
+        paragraphs = [p.strip() for p in text.splitlines() if p.strip()]
+
+    passages = []
+    for paragraph in paragraphs:
+        current: List[str] = []
+        words = 0
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            sentence_words = len(sentence.split())
+            if current and words + sentence_words > max_words:
+                passages.append(" ".join(current))
+                current, words = [], 0
+            current.append(sentence)
+            words += sentence_words
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+class PassageIndex:
+    """BM25 index over one article's passages, scored in batch with NumPy"""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+
+        tokenized = [tokenize(passage) for passage in passages]
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        # Term frequencies as a dense (passages x terms) matrix; one article is small
+        self.tf = np.zeros((len(passages), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                self.tf[row, self.vocabulary[token]] += 1
+
+        lengths = self.tf.sum(axis=1)
+        average_length = max(float(lengths.mean()), 1.0) if len(passages) else 1.0
+        self.length_norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        df = (self.tf > 0).sum(axis=0)
+        n = len(passages)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.token_counts = [estimate_tokens(passage) for passage in passages]
+
+    @classmethod
+    def from_text(cls, text: str, max_words: int = 120) -> "PassageIndex":
+        return cls(split_passages(text, max_words=max_words))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every passage for a query"""
+        columns = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not columns:
+            return np.zeros(len(self.passages), dtype=np.float32)
+        tf = self.tf[:, columns]
+        weights = tf * (self.k1 + 1) / (tf + self.length_norm[:, None])
+        return weights @ self.idf[columns]
+
+    def retrieve(self, queries: List[str], token_budget: int) -> List[str]:
+        """Most relevant passages for all queries that fit in token_budget, in article order"""
+        if not self.passages:
+            return []
+
+        # Normalise per query so a long opposing argument doesn't drown out the user
+        combined = np.zeros(len(self.passages), dtype=np.float32)
+        for query in queries:
+            scores = self.scores(query)
+            if scores.max() > 0:
+                combined += scores / scores.max()
+
+        chosen = []
+        used = 0
+        for i in np.argsort(-combined, kind="stable"):
+            if combined[i] <= 0:
+                break
+            if used + self.token_counts[i] > token_budget:
+                continue
+            chosen.append(int(i))
+            used += self.token_counts[i]
+
+        return [self.passages[i] for i in sorted(chosen)]
@@ -0,0 +1,107 @@
+"""Open-loop overload test for the debate API's admission control.
+
+Sends a fixed arrival rate of POST /debates and POST /debates/{id}/input
+requests, regardless of how fast the server answers, and reports latency
+percentiles for admitted requests alongside the number shed with 429.
+
+Usage:
+    uvicorn main:app --port 8000
+    python benchmarks/admission_load_test.py --rate 40 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+ARTICLE = {
+    "article_title": "Load test article",
+    "article_content": "A short article used to open debate sessions for load testing."
+}
+
+async def send(client: httpx.AsyncClient, kind: str, debate_ids: list, results: dict) -> None:
+    start = time.perf_counter()
+    try:
+        if kind == "new":
+            response = await client.post("/debates", json=ARTICLE)
+        else:
+            debate_id = random.choice(debate_ids)
+            response = await client.post(
+                f"/debates/{debate_id}/input",
+                json={"debate_id": debate_id, "user_input": "continue"}
+            )
+        status = response.status_code
+        retry_after = response.headers.get("Retry-After")
+    except httpx.HTTPError as e:
+        status, retry_after = type(e).__name__, None
+    results[kind].append((status, time.perf_counter() - start, retry_after))
+
+def summarize(rows: list) -> dict:
+    ok = np.array([latency for status, latency, _ in rows if status == 200]) * 1000
+    shed = [row for row in rows if row[0] == 429]
+    statuses = defaultdict(int)
+    for status, _, _ in rows:
+        statuses[str(status)] += 1
+    return {
+        "sent": len(rows),
+        "statuses": dict(statuses),
+        "admitted_ms_p50": float(np.percentile(ok, 50)) if len(ok) else None,
+        "admitted_ms_p99": float(np.percentile(ok, 99)) if len(ok) else None,
+        "admitted_ms_max": float(ok.max()) if len(ok) else None,
+        "shed_retry_after_median": float(np.median([int(r[2]) for r in shed if r[2]])) if shed else None,
+    }
+
+async def run_load_test(base_url: str, rate: float, duration: float, continue_ratio: float, seed_debates: int) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        # Debates for the "continue" share of the traffic
+        debate_ids = []
+        for _ in range(seed_debates):
+            response = await client.post("/debates", json=ARTICLE)
+            if response.status_code == 200:
+                debate_ids.append(response.json()["debate_id"])
+        if continue_ratio and not debate_ids:
+            raise RuntimeError("Could not create any debates to continue")
+
+        results = defaultdict(list)
+        tasks = []
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < duration:
+            kind = "continue" if random.random() < continue_ratio else "new"
+            tasks.append(asyncio.create_task(send(client, kind, debate_ids, results)))
+            sent += 1
+            # Open loop: schedule the next arrival without waiting for replies
+            await asyncio.sleep(max(start + sent / rate - time.perf_counter(), 0))
+        await asyncio.gather(*tasks)
+
+        metrics = (await client.get("/metrics")).json()
+
+    return {
+        "rate": rate,
+        "duration": duration,
+        "new": summarize(results["new"]),
+        "continue": summarize(results["continue"]),
+        "server_metrics": metrics,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission control overload test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rate", type=float, default=20, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--continue-ratio", type=float, default=0.5)
+    parser.add_argument("--seed-debates", type=int, default=5)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load_test(
+        args.base_url, args.rate, args.duration, args.continue_ratio, args.seed_debates
+    ))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Measure the local claim-review index against the Google Fact Check API.
+
+Record remote answers for a fixed query set once, then compare local lookups
+against the recording:
+
+    python benchmarks/claim_index.py record queries.json recorded.jsonl
+    python benchmarks/claim_index.py compare claims.db recorded.jsonl --exports 'exports/*.json'
+    python benchmarks/claim_index.py compare claims.db recorded.jsonl --min-claim-coverage 0.6
+
+Precision and recall are over review URLs: of the reviews a confident local
+lookup returns, how many the remote API also returned, and of the reviews the
+remote API returned, how many a confident local lookup found.
+
+queries.json is a JSON list of query strings (e.g. past debate arguments).
+"record" needs GROQ_API_KEY and GOOGLE_FACT_CHECK_API_KEY, like the API itself.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.fact_checker import FactCheckerAgent
+from app.utils.claim_index import ClaimReviewIndex
+
+def review_urls(response: dict) -> set:
+    return {
+        review.get("url")
+        for claim in response.get("claims", [])
+        for review in claim.get("claimReview", [])
+    }
+
+def record(queries_path: str, output_path: str) -> None:
+    checker = FactCheckerAgent(os.getenv("GROQ_API_KEY"), os.getenv("GOOGLE_FACT_CHECK_API_KEY"))
+    with open(queries_path) as f:
+        queries = json.load(f)
+    with open(output_path, "w") as out:
+        for query in queries:
+            start = time.perf_counter()
+            response = checker.query_remote_api(query)
+            seconds = time.perf_counter() - start
+            out.write(json.dumps({"query": query, "response": response, "seconds": seconds}) + "\n")
+    print(f"Recorded {len(queries)} queries to {output_path}")
+
+def compare(db_path: str,
+            recorded_path: str,
+            exports: str = None,
+            min_term_overlap: int = 3,
+            min_claim_coverage: float = 0.75) -> dict:
+    index = ClaimReviewIndex(
+        db_path, min_term_overlap=min_term_overlap, min_claim_coverage=min_claim_coverage
+    )
+    if exports:
+        index.refresh(exports)
+
+    with open(recorded_path) as f:
+        recordings = [json.loads(line) for line in f if line.strip()]
+
+    local_seconds, hits, false_hits = [], 0, 0
+    matched, returned, expected = 0, 0, 0
+    for recording in recordings:
+        start = time.perf_counter()
+        local, unmatched = index.search(recording["query"])
+        local_seconds.append(time.perf_counter() - start)
+
+        remote = review_urls(recording["response"])
+        expected += len(remote)
+        if not unmatched:
+            # Only queries answered in full replace the remote call
+            found = review_urls(local)
+            hits += 1
+            false_hits += not (found & remote)
+            matched += len(found & remote)
+            returned += len(found)
+
+    local_ms = np.array(local_seconds) * 1000
+    remote_ms = np.array([r["seconds"] for r in recordings]) * 1000
+    return {
+        "queries": len(recordings),
+        "local_hit_rate": hits / len(recordings),
+        "local_ms_p50": float(np.percentile(local_ms, 50)),
+        "local_ms_p99": float(np.percentile(local_ms, 99)),
+        "remote_ms_p50": float(np.percentile(remote_ms, 50)),
+        "remote_ms_p99": float(np.percentile(remote_ms, 99)),
+        # Confident answers sharing no review with the remote API
+        "local_false_hit_rate": false_hits / hits if hits else None,
+        "review_precision": matched / returned if returned else None,
+        "review_recall": matched / expected if expected else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Local claim-review index vs remote API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Record remote API responses for a query set")
+    rec.add_argument("queries")
+    rec.add_argument("output")
+
+    cmp_ = sub.add_parser("compare", help="Compare local lookups with a recording")
+    cmp_.add_argument("db")
+    cmp_.add_argument("recorded")
+    cmp_.add_argument("--exports", help="Glob of ClaimReview exports to load first")
+    cmp_.add_argument("--min-term-overlap", type=int, default=3)
+    cmp_.add_argument("--min-claim-coverage", type=float, default=0.75)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.queries, args.output)
+    else:
+        print(json.dumps(compare(
+            args.db, args.recorded, args.exports, args.min_term_overlap, args.min_claim_coverage
+        ), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare tree ensembles on raw TF-IDF against reduced feature sets.
+
+Each model is fitted on the full TF-IDF columns and on every requested
+chi2 / SVD width. The report lists fit time, predict latency (including the
+reducer's transform), memory and accuracy, followed by the fastest setting
+per model that stays within --max-accuracy-drop of that model's best.
+
+Candidates are fitted one at a time by default so fit and predict timings
+are not measured under CPU contention.
+
+Usage:
+    python benchmarks/feature_reduction.py Fake.csv True.csv \\
+        --chi2 500 2000 10000 --svd 100 300 --max-accuracy-drop 0.005
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.classifier.training import recommend, run_sweep
+
+COLUMNS = [
+    "model", "reduction", "n_features", "accuracy", "fit_seconds", "predict_ms_per_doc",
+    "predict_ms_single", "model_bytes", "reducer_bytes", "train_matrix_bytes",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature reduction effect on fit time, latency and accuracy")
+    parser.add_argument("fake")
+    parser.add_argument("true")
+    parser.add_argument("--cache-dir", default=".classifier_cache")
+    parser.add_argument("--models", nargs="*", default=["GBC", "RFC"])
+    parser.add_argument("--chi2", nargs="*", type=int, default=[500, 2000, 10000])
+    parser.add_argument("--svd", nargs="*", type=int, default=[100, 300])
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005)
+    parser.add_argument("--n-jobs", type=int, default=1,
+                        help="Parallel fits; keep at 1 unless only accuracy matters")
+    parser.add_argument("--refit", action="store_true", help="Ignore cached fitted models")
+    args = parser.parse_args()
+
+    specs = ["none"] + [f"chi2:{k}" for k in args.chi2] + [f"svd:{k}" for k in args.svd]
+    report = run_sweep(
+        args.fake,
+        args.true,
+        cache_dir=args.cache_dir,
+        models=args.models,
+        reductions={name: specs for name in args.models},
+        n_jobs=args.n_jobs,
+        refit=args.refit
+    )
+    report = report.sort_values(["model", "n_features"], ascending=[True, False])
+    print(report[COLUMNS].to_string(index=False))
+
+    print(f"\nFastest to fit within {args.max_accuracy_drop} accuracy of each model's best:")
+    print(recommend(report, args.max_accuracy_drop)[COLUMNS].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure revision rounds and writer prompt size with and without passage retrieval.
+
+Each article is summarised once. Then the same debate turns are played with
+retrieval off and on: write an argument, fact check it, and revise until it
+passes or max revisions is reached.
+
+Needs GROQ_API_KEY and GOOGLE_FACT_CHECK_API_KEY, like the API itself.
+
+Usage:
+    python benchmarks/passage_retrieval.py articles.json --turns 2 --max-revisions 3
+
+articles.json is a JSON list of {"title": ..., "content": ...} objects.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.api.graph as graph
+from app.utils.metrics import metrics
+from app.utils.models import Article, DebateState
+
+def play_debate(state: DebateState, turns: int, max_revisions: int) -> dict:
+    revisions = 0
+    passed = 0
+    for turn in range(turns):
+        position = "pro" if turn % 2 == 0 else "con"
+        writer = graph.pro_writer_agent if position == "pro" else graph.con_writer_agent
+        summary, evidence = graph.writer_context(state, "")
+
+        argument = writer.create_argument(
+            article_summary=summary,
+            previous_arguments=state.arguments,
+            argument_number=turn // 2 + 1,
+            evidence=evidence
+        )
+        is_verified, feedback, argument = graph.fact_checker_agent.verify_argument(argument)
+        rounds = 0
+        while not is_verified and rounds < max_revisions:
+            argument = writer.revise_argument(argument, feedback)
+            is_verified, feedback, argument = graph.fact_checker_agent.verify_argument(argument)
+            rounds += 1
+
+        revisions += rounds
+        passed += is_verified
+        state.arguments.append(argument)
+    return {"revisions": revisions, "passed": passed}
+
+def run(articles: list, turns: int, max_revisions: int) -> dict:
+    states = []
+    for article in articles:
+        state = DebateState(article=Article(title=article["title"], content=article["content"]))
+        state.summary = graph.reader_agent.analyze_article(state.article)
+        states.append(state)
+
+    results = {}
+    for retrieval in (False, True):
+        graph.PASSAGE_RETRIEVAL = retrieval
+        before = metrics.snapshot()
+        revisions = passed = 0
+        for state in states:
+            outcome = play_debate(state.model_copy(deep=True), turns, max_revisions)
+            revisions += outcome["revisions"]
+            passed += outcome["passed"]
+        after = metrics.snapshot()
+
+        arguments = len(states) * turns
+        prompts = after.get("writer_prompts", 0) - before.get("writer_prompts", 0)
+        tokens = after.get("writer_prompt_tokens", 0) - before.get("writer_prompt_tokens", 0)
+        results["retrieval" if retrieval else "summary_only"] = {
+            "arguments": arguments,
+            "revisions_per_argument": revisions / arguments,
+            "pass_rate": passed / arguments,
+            "writer_prompt_tokens_mean": tokens / prompts if prompts else None,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Passage retrieval effect on revisions and prompt size")
+    parser.add_argument("articles", help="JSON list of {title, content}")
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--max-revisions", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.articles) as f:
+        articles = json.load(f)
+    print(json.dumps(run(articles, args.turns, args.max_revisions), indent=2))
+
+if __name__ == "__main__":
+    main()
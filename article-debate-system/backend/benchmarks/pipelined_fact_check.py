@@ -0,0 +1,89 @@
+"""Compare turn latency of sequential and pipelined fact checking.
+
+For each article summary, one turn is generated the current way
+(create_argument, then verify_argument) and one the pipelined way
+(create_verified_argument). The pipelined argument is also re-checked as a
+whole with verify_argument to measure how often the two verdicts agree.
+Pipelined mode accepts an argument whose paragraphs all pass without that
+whole check, so agreement is only meaningful against the real models.
+
+Needs GROQ_API_KEY and GOOGLE_FACT_CHECK_API_KEY, like the API itself.
+
+Usage:
+    python benchmarks/pipelined_fact_check.py --summaries summaries.json --repeats 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.pipeline import create_verified_argument
+from app.api.graph import fact_checker_agent, pro_writer_agent
+
+DEFAULT_SUMMARIES = [
+    "The article argues that a four-day work week raises productivity, citing a UK pilot "
+    "in which most of 61 companies kept the schedule after six months.",
+    "The article claims that electric vehicles produce lower lifetime emissions than petrol "
+    "cars in most countries, even accounting for battery manufacturing.",
+    "The article says remote learning during 2020 and 2021 caused measurable learning loss "
+    "in mathematics, especially for younger students.",
+]
+
+def run_turns(summaries, repeats):
+    rows = []
+    for summary in summaries:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            argument = pro_writer_agent.create_argument(summary, [])
+            sequential_verdict, _, _ = fact_checker_agent.verify_argument(argument)
+            sequential_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            piped_argument, precheck = create_verified_argument(
+                pro_writer_agent, fact_checker_agent, summary, []
+            )
+            pipelined_verdict = precheck.is_verified
+            pipelined_seconds = time.perf_counter() - start
+
+            whole_verdict, _, _ = fact_checker_agent.verify_argument(piped_argument.model_copy())
+            rows.append({
+                "sequential_seconds": sequential_seconds,
+                "pipelined_seconds": pipelined_seconds,
+                "sequential_verified": sequential_verdict,
+                "pipelined_verified": pipelined_verdict,
+                "verdict_matches_whole_check": pipelined_verdict == whole_verdict,
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pipelined fact checking latency")
+    parser.add_argument("--summaries", help="JSON list of article summaries")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    summaries = DEFAULT_SUMMARIES
+    if args.summaries:
+        with open(args.summaries) as f:
+            summaries = json.load(f)
+
+    rows = run_turns(summaries, args.repeats)
+    sequential = np.array([row["sequential_seconds"] for row in rows])
+    pipelined = np.array([row["pipelined_seconds"] for row in rows])
+    print(json.dumps({
+        "turns": len(rows),
+        "sequential_seconds_p50": float(np.median(sequential)),
+        "pipelined_seconds_p50": float(np.median(pipelined)),
+        "sequential_seconds_p95": float(np.percentile(sequential, 95)),
+        "pipelined_seconds_p95": float(np.percentile(pipelined, 95)),
+        "sequential_pass_rate": float(np.mean([row["sequential_verified"] for row in rows])),
+        "pipelined_pass_rate": float(np.mean([row["pipelined_verified"] for row in rows])),
+        "verdict_agreement": float(np.mean([row["verdict_matches_whole_check"] for row in rows])),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Local load test for the /debates/{id}/ws endpoint.
+
+Opens many concurrent WebSocket connections to one debate and measures
+ping/pong round-trip latency, which exercises the session plumbing without
+spending LLM calls.
+
+Usage:
+    uvicorn main:app --port 8000
+    python benchmarks/ws_load_test.py --connections 200 --messages 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import requests
+import websockets
+
+async def run_client(url: str, messages: int, latencies: list, stats: dict) -> None:
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            stats["open"] += 1
+            stats["peak"] = max(stats["peak"], stats["open"])
+            for i in range(messages):
+                start = time.perf_counter()
+                await ws.send(json.dumps({"type": "ping", "sent_at": i}))
+                # Skip replayed debate events and heartbeats until our pong arrives
+                while True:
+                    reply = json.loads(await ws.recv())
+                    if reply.get("type") == "pong" and reply.get("sent_at") == i:
+                        break
+                latencies.append(time.perf_counter() - start)
+            stats["open"] -= 1
+    except Exception as e:
+        stats["failed"] += 1
+        stats["errors"].add(type(e).__name__)
+
+async def run_load_test(url: str, connections: int, messages: int) -> dict:
+    latencies: list = []
+    stats = {"open": 0, "peak": 0, "failed": 0, "errors": set()}
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(url, messages, latencies, stats) for _ in range(connections)])
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "connections": connections,
+        "peak_open_connections": stats["peak"],
+        "failed_connections": stats["failed"],
+        "errors": sorted(stats["errors"]),
+        "messages": len(latencies),
+        "messages_per_second": len(latencies) / elapsed,
+        "latency_ms_p50": float(np.percentile(ms, 50)),
+        "latency_ms_p95": float(np.percentile(ms, 95)),
+        "latency_ms_p99": float(np.percentile(ms, 99)),
+        "latency_ms_max": float(ms.max()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket debate session load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--debate-id", help="Existing debate; one is created when omitted")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    debate_id = args.debate_id
+    if not debate_id:
+        response = requests.post(f"{args.base_url}/debates", json={
+            "article_title": "Load test article",
+            "article_content": "A short article used to open a debate session for load testing."
+        })
+        debate_id = response.json().get("debate_id")
+        if not debate_id:
+            parser.error(f"Could not create a debate ({response.status_code}); pass --debate-id")
+
+    ws_url = args.base_url.replace("http", "ws", 1) + f"/debates/{debate_id}/ws"
+    result = asyncio.run(run_load_test(ws_url, args.connections, args.messages))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
-from fastapi import FastAPI, HTTPException, Depends, Body
+from fastapi import FastAPI, HTTPException, Depends, Body, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from app.utils.models import Article, DebateState, Argument
 from app.api.graph import create_debate_graph, supervisor_agent
+from app.api.admission import admission_controller, CONTINUE_DEBATE, NEW_DEBATE
+from app.utils.deadline import Deadline, DebateCancelled, run_with_deadline
+from app.utils.metrics import metrics
+import asyncio
+import collections
+import itertools
+import json
+import math
 import os
+import time
 from dotenv import load_dotenv
 import uvicorn
 
@@ -19,6 +28,20 @@ graph_config = {
     "recursion_limit": 50  # Higher limit for complex debates
 }
 
+# WebSocket session settings
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "15"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+# Live events a connection may fall behind by before it is closed with 1013
+WS_MAX_PENDING_EVENTS = int(os.getenv("WS_MAX_PENDING_EVENTS", "100"))
+# Replayed events sent before yielding to other connections
+WS_REPLAY_BATCH_EVENTS = int(os.getenv("WS_REPLAY_BATCH_EVENTS", "50"))
+# Most recent events kept per debate for replay
+WS_EVENT_LOG_SIZE = int(os.getenv("WS_EVENT_LOG_SIZE", "500"))
+
+# Longest a request may spend in the graph; clients can ask for less with X-Request-Timeout
+DEBATE_REQUEST_TIMEOUT_SECONDS = float(os.getenv("DEBATE_REQUEST_TIMEOUT_SECONDS", "120"))
+DISCONNECT_POLL_SECONDS = 0.5
+
 class DebateRequest(BaseModel):
     article_title: str
     article_content: str
@@ -45,9 +68,107 @@ class DebateResponse(BaseModel):
 
 # In-memory store for debate states (in a production app, use a database)
 debate_sessions = {}
+debate_ids = itertools.count(1)
+
+def new_session(state: DebateState) -> Dict[str, Any]:
+    """Create the in-memory record for a debate"""
+    return {
+        "state": state,
+        "graph": debate_graph,
+        # Ordered event log replayed to WebSocket clients that reconnect;
+        # only the most recent WS_EVENT_LOG_SIZE events are kept
+        "events": collections.deque(maxlen=WS_EVENT_LOG_SIZE),
+        "next_event_id": 0,
+        "published_arguments": 0,
+        "listeners": set(),
+        "turn_lock": asyncio.Lock()
+    }
+
+def publish_event(session: Dict[str, Any], event_type: str, **payload) -> None:
+    """Append an event to the session log and wake connected WebSockets"""
+    event = {"id": session["next_event_id"], "type": event_type, **payload}
+    session["next_event_id"] += 1
+    session["events"].append(event)
+    for listener in session["listeners"]:
+        listener.set()
+
+def events_from(session: Dict[str, Any], event_id: int, limit: int) -> List[Dict[str, Any]]:
+    """Up to limit logged events starting at event_id, or at the oldest one still kept"""
+    events = session["events"]
+    start = max(event_id - (session["next_event_id"] - len(events)), 0)
+    return list(itertools.islice(events, start, start + limit))
+
+def publish_state(session: Dict[str, Any], state: DebateState) -> None:
+    """Publish arguments that clients have not seen yet, then the turn status"""
+    for arg in state.arguments[session["published_arguments"]:]:
+        if arg is not None:
+            publish_event(
+                session,
+                "argument",
+                content=arg.content,
+                position=arg.position,
+                number=arg.number,
+                verified=arg.verified
+            )
+    session["published_arguments"] = len(state.arguments)
+    publish_event(
+        session,
+        "turn_complete",
+        current_turn=state.current_turn,
+        is_active=state.is_active,
+        iteration_count=state.iteration_count
+    )
+
+def request_deadline(http_request: Request) -> Deadline:
+    """Build the request deadline, honouring a shorter X-Request-Timeout header"""
+    timeout = DEBATE_REQUEST_TIMEOUT_SECONDS
+    header = http_request.headers.get("x-request-timeout")
+    if header is not None:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = math.nan
+        # nan would slip through min() and never expire
+        if not math.isfinite(requested) or requested <= 0:
+            raise HTTPException(status_code=400, detail="X-Request-Timeout must be a positive number of seconds")
+        timeout = min(requested, timeout)
+    return Deadline(timeout)
+
+async def run_cancellable(http_request: Optional[Request], deadline: Deadline, fn, *args, **kwargs):
+    """Run blocking graph work in a thread, cancelling it on disconnect or timeout.
+
+    Cancellation is cooperative: graph nodes and agent calls check the deadline,
+    so the work stops at the next node or LLM/HTTP call.
+    """
+    work = asyncio.ensure_future(asyncio.to_thread(run_with_deadline, deadline, fn, *args, **kwargs))
+    while True:
+        done, _ = await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            break
+        if http_request is not None and await http_request.is_disconnected():
+            deadline.cancel("client disconnected")
+        # Reading the flag also trips the deadline once it has passed
+        deadline.cancelled
+
+    try:
+        result = work.result()
+    except DebateCancelled:
+        metrics.increment("requests_cancelled")
+        metrics.increment(f"requests_cancelled_{deadline.reason.replace(' ', '_')}")
+        metrics.increment("llm_calls_wasted", deadline.calls_completed)
+        raise HTTPException(status_code=504, detail=f"Request cancelled: {deadline.reason}")
+
+    if http_request is not None and await http_request.is_disconnected():
+        # Finished, but nobody is left to receive the result
+        metrics.increment("requests_wasted")
+        metrics.increment("llm_calls_wasted", deadline.calls_completed)
+    else:
+        metrics.increment("requests_completed")
+        metrics.increment("llm_calls_delivered", deadline.calls_completed)
+    return result
 
 @app.post("/debates", response_model=DebateResponse)
-async def create_debate(request: DebateRequest):
+async def create_debate(request: DebateRequest, http_request: Request):
     """Start a new debate based on an article"""
     
     # Create article object
@@ -59,22 +180,30 @@ async def create_debate(request: DebateRequest):
     
     # Initialize debate state
     initial_state = supervisor_agent.initialize_debate(article)
+    deadline = request_deadline(http_request)
+    
+    # Raises a 429 with Retry-After when the server is saturated
+    await admission_controller.acquire(NEW_DEBATE)
+    started = time.monotonic()
     
     try:
-        # Generate a simple ID (use UUID in production)
-        debate_id = f"debate_{len(debate_sessions) + 1}"
-        
-        # Store the initial state and graph
-        debate_sessions[debate_id] = {
-            "state": initial_state,
-            "graph": debate_graph
-        }
+        # Run the first turn before the debate is stored, so a failed or
+        # cancelled create leaves no session behind
+        next_state = await run_cancellable(
+            http_request,
+            deadline,
+            stream_graph,
+            debate_graph,
+            initial_state
+        )
         
-        # Start the graph execution with increased recursion limit
-        next_state = debate_graph.invoke(initial_state, config=graph_config)
+        # Generate a simple ID (use UUID in production). A counter rather than
+        # len(debate_sessions) keeps ids unique if sessions are ever removed.
+        debate_id = f"debate_{next(debate_ids)}"
         
-        # Update stored state
-        debate_sessions[debate_id]["state"] = next_state
+        # Store the state and graph
+        debate_sessions[debate_id] = new_session(next_state)
+        publish_state(debate_sessions[debate_id], next_state)
         
         # Convert to response format
         response = DebateResponse(
@@ -89,63 +218,94 @@ async def create_debate(request: DebateRequest):
         )
         
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating debate: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating debate: {str(e)}")
+    finally:
+        admission_controller.release(time.monotonic() - started)
 
 @app.post("/debates/{debate_id}/input", response_model=DebateResponse)
-async def add_user_input(debate_id: str, input_request: UserInputRequest):
+async def add_user_input(debate_id: str, input_request: UserInputRequest, http_request: Request):
     """Add user input to an ongoing debate"""
     
     if debate_id not in debate_sessions:
         raise HTTPException(status_code=404, detail="Debate session not found")
     
-    try:
-        # Get current state and graph
-        current_state = debate_sessions[debate_id]["state"]
-        graph = debate_sessions[debate_id]["graph"]
-        
-        # Process user input
-        updated_state = supervisor_agent.process_user_input(
-            current_state, 
-            input_request.user_input
-        )
-        
-        # Continue the graph execution if debate is still active
-        if updated_state.is_active:
-            # Use increased recursion limit when continuing
-            next_state = graph.continue_from(updated_state, config=graph_config)
-            debate_sessions[debate_id]["state"] = next_state
-        else:
-            debate_sessions[debate_id]["state"] = updated_state
-            next_state = updated_state
+    session = debate_sessions[debate_id]
+    deadline = request_deadline(http_request)
+    
+    # One turn at a time per debate, shared with WebSocket turns. Refuse rather
+    # than queue: a second turn would overwrite the state this one produces.
+    if session["turn_lock"].locked():
+        raise HTTPException(status_code=409, detail="Another turn is already running for this debate")
+    
+    async with session["turn_lock"]:
+        # Continuing debates are admitted ahead of new ones
+        await admission_controller.acquire(CONTINUE_DEBATE)
+        started = time.monotonic()
         
-        # Format arguments for response
-        formatted_arguments = [
-            ArgumentResponse(
-                content=arg.content,
-                position=arg.position,
-                number=arg.number
+        try:
+            # Work on a copy of the current state so a cancelled turn is rolled back
+            current_state = session["state"].model_copy(deep=True)
+            was_active = current_state.is_active
+            graph = session["graph"]
+            
+            # Process user input
+            updated_state = supervisor_agent.process_user_input(
+                current_state, 
+                input_request.user_input
             )
-            for arg in next_state.arguments
-        ]
-        
-        # Create response
-        response = DebateResponse(
-            debate_id=debate_id,
-            article_title=next_state.article.title,
-            summary=next_state.summary,
-            arguments=formatted_arguments,
-            current_turn=next_state.current_turn,
-            waiting_for_user=True,  # Always true when returning to frontend
-            is_active=next_state.is_active,
-            iteration_count=next_state.iteration_count
-        )
-        
-        return response
-    except Exception as e:
-        print(f"Error processing input: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing input: {str(e)}")
+            
+            # Continue the graph execution if debate is still active
+            if updated_state.is_active:
+                # The graph resumes at the status check for a debate already under way
+                next_state = await run_cancellable(
+                    http_request,
+                    deadline,
+                    stream_graph,
+                    graph,
+                    updated_state
+                )
+                session["state"] = next_state
+            else:
+                session["state"] = updated_state
+                next_state = updated_state
+            # A debate that had already ended has nothing new to tell listeners
+            if was_active:
+                publish_state(session, next_state)
+            
+            # Format arguments for response
+            formatted_arguments = [
+                ArgumentResponse(
+                    content=arg.content,
+                    position=arg.position,
+                    number=arg.number
+                )
+                for arg in next_state.arguments
+            ]
+            
+            # Create response
+            response = DebateResponse(
+                debate_id=debate_id,
+                article_title=next_state.article.title,
+                summary=next_state.summary,
+                arguments=formatted_arguments,
+                current_turn=next_state.current_turn,
+                waiting_for_user=True,  # Always true when returning to frontend
+                is_active=next_state.is_active,
+                iteration_count=next_state.iteration_count
+            )
+            
+            return response
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error processing input: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error processing input: {str(e)}")
+        finally:
+            admission_controller.release(time.monotonic() - started)
 
 @app.get("/debates/{debate_id}", response_model=DebateResponse)
 async def get_debate_status(debate_id: str):
@@ -184,5 +344,169 @@ async def get_debate_status(debate_id: str):
         print(f"Error getting debate status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting debate status: {str(e)}")
 
+@app.get("/metrics")
+async def get_metrics():
+    """Counters for completed, cancelled and wasted debate work plus admission state"""
+    return {**metrics.snapshot(), **admission_controller.stats()}
+
+def stream_graph(graph: Any, state: DebateState, on_verdict=None) -> DebateState:
+    """Run one debate turn, reporting each fact-check verdict as soon as it is made.
+
+    A new debate starts at article analysis and later turns resume at the
+    status check; either way the run stops once the next argument is ready.
+    """
+    latest = state
+    # Pass every field: a model input only carries the fields marked as set,
+    # which misses lists changed in place such as user_inputs
+    for chunk in graph.stream(dict(state), config=graph_config, stream_mode="values"):
+        latest = DebateState.model_validate(chunk)
+        # Only fact_check_argument leaves a verdict behind; the next node clears it
+        if on_verdict is not None and latest.fact_check is not None and latest.pending_argument is not None:
+            on_verdict(
+                position=latest.pending_argument.position,
+                number=latest.pending_argument.number,
+                is_verified=latest.fact_check.is_verified,
+                feedback=latest.fact_check.feedback
+            )
+    return latest
+
+async def run_websocket_turn(session: Dict[str, Any], user_input: str) -> None:
+    """Apply one user input to a hot session and publish the resulting events"""
+    loop = asyncio.get_running_loop()
+
+    def on_verdict(**payload):
+        # Called from the worker thread running the graph
+        loop.call_soon_threadsafe(lambda: publish_event(session, "verdict", **payload))
+
+    async with session["turn_lock"]:
+        try:
+            # Work on a copy so a cancelled or failed turn leaves the session unchanged
+            working_state = session["state"].model_copy(deep=True)
+            updated_state = supervisor_agent.process_user_input(working_state, user_input)
+            if updated_state.is_active:
+                await admission_controller.acquire(CONTINUE_DEBATE)
+                started = time.monotonic()
+                try:
+                    # The connection may drop and resume, so only the deadline cancels a turn
+                    next_state = await run_cancellable(
+                        None,
+                        Deadline(DEBATE_REQUEST_TIMEOUT_SECONDS),
+                        stream_graph,
+                        session["graph"],
+                        updated_state,
+                        on_verdict
+                    )
+                finally:
+                    admission_controller.release(time.monotonic() - started)
+            else:
+                next_state = updated_state
+            session["state"] = next_state
+            publish_state(session, next_state)
+        except HTTPException as e:
+            retry_after = (e.headers or {}).get("Retry-After")
+            publish_event(session, "error", detail=e.detail, retry_after=retry_after)
+        except Exception as e:
+            print(f"Error processing websocket input: {str(e)}")
+            publish_event(session, "error", detail=f"Error processing input: {str(e)}")
+
+@app.websocket("/debates/{debate_id}/ws")
+async def debate_websocket(websocket: WebSocket, debate_id: str, last_event_id: int = -1):
+    """Interactive debate session that pushes argument and verdict events.
+
+    Clients send {"type": "input", "user_input": "continue" | "done" | text}
+    or {"type": "ping"}. Reconnecting with ?last_event_id=N replays every
+    event after N. Only the last WS_EVENT_LOG_SIZE events are kept; when
+    some of the requested ones are gone, the replay starts with
+    {"type": "replay_truncated", "first_event_id": M}.
+
+    The server sends {"type": "heartbeat"} every WS_HEARTBEAT_SECONDS, and
+    clients must answer each one with {"type": "pong"}. A connection that
+    sends nothing for WS_IDLE_TIMEOUT_SECONDS is closed with code 1001,
+    except while a turn for the debate is running.
+    """
+    if debate_id not in debate_sessions:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    session = debate_sessions[debate_id]
+    wakeup = asyncio.Event()
+    session["listeners"].add(wakeup)
+    last_seen = time.monotonic()
+    turn_task: Optional[asyncio.Task] = None
+
+    async def send_events():
+        nonlocal last_seen
+        cursor = max(last_event_id + 1, 0)
+        # Events logged before the connection opened are replay, not backlog
+        live_from = session["next_event_id"]
+        while True:
+            wakeup.clear()
+            while cursor < session["next_event_id"]:
+                # Backpressure: a client this far behind on live events should
+                # reconnect and resume from its last event id
+                if session["next_event_id"] - max(cursor, live_from) > WS_MAX_PENDING_EVENTS:
+                    await websocket.close(code=1013)
+                    return
+                batch = events_from(session, cursor, WS_REPLAY_BATCH_EVENTS)
+                if batch[0]["id"] > cursor:
+                    # Older events have left the log; GET /debates/{id} has the full state
+                    await websocket.send_json({"type": "replay_truncated", "first_event_id": batch[0]["id"]})
+                for event in batch:
+                    await websocket.send_json(event)
+                cursor = batch[-1]["id"] + 1
+                # Let other connections run between batches of a long replay
+                await asyncio.sleep(0)
+
+            # A client waiting on a long turn is not idle
+            if session["turn_lock"].locked():
+                last_seen = time.monotonic()
+            if time.monotonic() - last_seen > WS_IDLE_TIMEOUT_SECONDS:
+                await websocket.close(code=1001)
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "heartbeat", "last_event_id": cursor - 1})
+
+    sender = asyncio.create_task(send_events())
+    try:
+        while True:
+            receive = asyncio.create_task(websocket.receive_text())
+            done, _ = await asyncio.wait({receive, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if sender in done:
+                receive.cancel()
+                break
+
+            last_seen = time.monotonic()
+            try:
+                message = json.loads(receive.result())
+                message_type = message.get("type")
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+
+            if message_type == "ping":
+                await websocket.send_json({"type": "pong", "sent_at": message.get("sent_at")})
+            elif message_type == "input":
+                if not session["state"].is_active:
+                    # Answered directly so finished debates stop growing the event log
+                    await websocket.send_json({"type": "error", "detail": "The debate has ended"})
+                    continue
+                # One turn at a time per debate; extra inputs are refused, not queued
+                if session["turn_lock"].locked() or (turn_task and not turn_task.done()):
+                    await websocket.send_json({"type": "busy"})
+                    continue
+                turn_task = asyncio.create_task(
+                    run_websocket_turn(session, str(message.get("user_input", "")))
+                )
+            elif message_type != "pong":
+                await websocket.send_json({"type": "error", "detail": f"Unknown message type: {message_type}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session["listeners"].discard(wakeup)
+        sender.cancel()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""AdmissionController queueing, load shedding and latency-driven limit.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.admission import CONTINUE_DEBATE, NEW_DEBATE, AdmissionController
+
+async def settle():
+    """Let queued tasks reach their await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_full_queue_is_refused_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+        await controller.acquire(NEW_DEBATE)
+        waiting = asyncio.create_task(controller.acquire(NEW_DEBATE))
+        await settle()
+
+        with pytest.raises(HTTPException) as refused:
+            await controller.acquire(NEW_DEBATE)
+
+        controller.release(2.0)
+        await waiting
+        return refused.value, controller
+
+    error, controller = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert controller.active == 1 and controller.queued() == 0
+
+def test_continuing_debate_evicts_the_newest_new_debate_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=2, queue_timeout=5)
+        await controller.acquire(NEW_DEBATE)
+        oldest = asyncio.create_task(controller.acquire(NEW_DEBATE))
+        await settle()
+        newest = asyncio.create_task(controller.acquire(NEW_DEBATE))
+        await settle()
+        continuing = asyncio.create_task(controller.acquire(CONTINUE_DEBATE))
+        await settle()
+
+        with pytest.raises(HTTPException) as evicted:
+            await newest
+
+        # The continuing debate takes the next free slot ahead of the older waiter
+        controller.release()
+        await continuing
+        assert not oldest.done()
+        controller.release()
+        await oldest
+        return evicted.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+def test_waiter_is_refused_after_the_queue_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+        await controller.acquire(NEW_DEBATE)
+        with pytest.raises(HTTPException) as refused:
+            await controller.acquire(CONTINUE_DEBATE)
+        return refused.value, controller
+
+    error, controller = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert controller.queued() == 0 and controller.active == 1
+
+def test_slow_nodes_shrink_the_limit_once_per_latency_window():
+    controller = AdmissionController(max_concurrency=8, target_node_latency=1.0, min_concurrency=2)
+
+    controller.observe_node_latency(5.0)
+    assert controller.limit == 6.0
+    # Same burst, still inside the latency window
+    controller.observe_node_latency(5.0)
+    assert controller.limit == 6.0
+
+    for _ in range(10):
+        controller._last_decrease = 0.0
+        controller.observe_node_latency(5.0)
+    assert controller.limit == 2.0
+
+def test_fast_nodes_grow_a_saturated_limit_up_to_the_maximum():
+    controller = AdmissionController(max_concurrency=4, target_node_latency=1.0)
+    controller.limit = 2.0
+
+    # Not saturated: nothing to grow for
+    controller.observe_node_latency(0.1)
+    assert controller.limit == 2.0
+
+    controller.active = 2
+    controller.observe_node_latency(0.1)
+    assert controller.limit == 2.5
+
+    controller.active = 4
+    for _ in range(20):
+        controller.observe_node_latency(0.1)
+    assert controller.limit == 4.0
@@ -0,0 +1,98 @@
+"""Classifier training sweep and memory-mapped artifacts on a tiny synthetic corpus.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.classifier import training
+from app.classifier.artifacts import ClassifierArtifact, export_artifact
+from app.classifier.preprocessing import wordopt
+from app.classifier.reduction import transformer
+
+def test_unknown_models_are_rejected_before_vectorizing():
+    # The CSV paths do not exist, so reaching vectorize() would raise FileNotFoundError
+    with pytest.raises(ValueError, match="LRX"):
+        training.run_sweep("missing-fake.csv", "missing-true.csv", models=["LR", "LRX"])
+
+def test_reductions_for_unselected_models_are_rejected():
+    with pytest.raises(ValueError, match="RFC"):
+        training.run_sweep(
+            "missing-fake.csv", "missing-true.csv",
+            models=["GBC"], reductions={"GBC": ["none"], "RFC": ["chi2:10"]}
+        )
+
+def synthetic_corpus(n_docs, seed):
+    """Short documents whose word mix depends on the label"""
+    rng = np.random.default_rng(seed)
+    shared = ["senate", "vote", "report", "city", "market", "court", "school", "river"]
+    fake = ["shocking", "secret", "hoax", "exposed", "viral"]
+    true = ["reuters", "official", "statement", "quarterly", "minister"]
+    texts, labels = [], []
+    for _ in range(n_docs):
+        label = int(rng.integers(2))
+        cue = true if label else fake
+        words = list(rng.choice(shared, size=12)) + list(rng.choice(cue, size=int(rng.integers(0, 4))))
+        words += list(rng.choice(true if not label else fake, size=int(rng.integers(0, 2))))
+        rng.shuffle(words)
+        texts.append(" ".join(words).title() + ". See [1] http://example.com")
+        labels.append(label)
+    return texts, np.array(labels)
+
+def test_artifact_predictions_match_the_pickled_models(tmp_path):
+    texts, labels = synthetic_corpus(300, seed=0)
+    vectorizer = TfidfVectorizer()
+    xv = vectorizer.fit_transform([wordopt(text) for text in texts])
+    selector = SelectKBest(chi2, k=6).fit(xv, labels)
+    models = {
+        "LR": LogisticRegression().fit(xv, labels),
+        "DT": DecisionTreeClassifier(random_state=0).fit(xv, labels),
+        "RFC": RandomForestClassifier(n_estimators=20, random_state=0).fit(xv, labels),
+        "GBC": GradientBoostingClassifier(n_estimators=20, random_state=0).fit(xv, labels),
+        "RFC__chi2-6": RandomForestClassifier(n_estimators=20, random_state=0).fit(
+            selector.transform(xv), labels
+        ),
+    }
+    # Compare against what the training sweep would have written to disk
+    vectorizer, models = pickle.loads(pickle.dumps((vectorizer, models)))
+    export_artifact(vectorizer, models, str(tmp_path), reducers={"RFC__chi2-6": selector})
+    artifact = ClassifierArtifact(str(tmp_path))
+
+    test_texts, _ = synthetic_corpus(50, seed=1)
+    for name, model in models.items():
+        reduce = transformer(selector if name == "RFC__chi2-6" else None)
+        for text in test_texts:
+            row = reduce(vectorizer.transform([wordopt(text)]))
+            assert artifact.predict(text, name) == model.predict(row)[0]
+            assert artifact.predict_proba(text, name) == pytest.approx(model.predict_proba(row)[0, 1])
+
+def test_tree_thresholds_compare_float32_feature_values(tmp_path):
+    # Two training values 15 float32 steps apart put the threshold exactly
+    # halfway between two float32 numbers. A float64 value at the threshold
+    # goes left, but sklearn rounds it up to float32 first and goes right.
+    low = np.nextafter(np.float32(0.1), np.float32(1))
+    high = low
+    for _ in range(15):
+        high = np.nextafter(high, np.float32(1))
+    value = (np.float64(low) + np.float64(high)) / 2
+
+    vectorizer = TfidfVectorizer().fit(["alpha beta"])
+    model = DecisionTreeClassifier().fit(np.array([[low, 0.0], [high, 0.0]]), [0, 1])
+    assert model.tree_.threshold[0] == value
+    export_artifact(vectorizer, {"DT": model}, str(tmp_path))
+    artifact = ClassifierArtifact(str(tmp_path))
+
+    leaves = artifact._tree_leaves(artifact._arrays["DT"], np.array([0]), np.array([value]))
+    assert leaves[0] == model.apply(np.array([[value, 0.0]]))[0]
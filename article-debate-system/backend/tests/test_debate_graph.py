@@ -0,0 +1,446 @@
+"""Debate turns through the compiled graph, with stub chat models instead of Groq.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import app.api.graph as graph
+import main
+from app.agents.fact_checker import FactCheckerAgent
+from app.utils.claim_index import ClaimReviewIndex
+from app.utils.deadline import Deadline, run_with_deadline
+from app.utils.models import Article
+from app.utils.passages import estimate_tokens
+
+class StubChat(BaseChatModel):
+    """Returns canned responses in order, repeating the last one"""
+    responses: List[str]
+    calls: int = 0
+    delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _next(self) -> str:
+        time.sleep(self.delay)
+        text = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return text
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._next()))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in self._next().split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+@pytest.fixture
+def agents(monkeypatch):
+    """Stub every agent's model and the Fact Check API"""
+    stubs = {
+        "reader": StubChat(responses=["The article says solar power grew quickly."]),
+        "pro": StubChat(responses=["Solar grew.\n\nIt is cheap."]),
+        "con": StubChat(responses=["Solar is intermittent.\n\nStorage is costly."]),
+        "fact_checker": StubChat(responses=["The argument PASSES fact checking."]),
+    }
+    monkeypatch.setattr(graph.reader_agent, "llm", stubs["reader"])
+    monkeypatch.setattr(graph.pro_writer_agent, "llm", stubs["pro"])
+    monkeypatch.setattr(graph.con_writer_agent, "llm", stubs["con"])
+    monkeypatch.setattr(graph.fact_checker_agent, "llm", stubs["fact_checker"])
+    monkeypatch.setattr(graph.fact_checker_agent, "check_facts_with_api", lambda query: {})
+    return stubs
+
+def new_state():
+    article = Article(title="Solar", content="Solar power grew.\n\nStorage costs fell.")
+    return main.supervisor_agent.initialize_debate(article)
+
+def test_first_turn_analyses_article_and_writes_one_argument(agents):
+    state = main.stream_graph(graph.create_debate_graph(), new_state())
+
+    assert state.summary == "The article says solar power grew quickly."
+    assert [(arg.position, arg.number, arg.verified) for arg in state.arguments] == [("pro", 1, True)]
+    assert state.current_turn == "con"
+    assert state.iteration_count == 1
+    assert state.pending_argument is None and state.fact_check is None
+
+def test_next_turn_resumes_without_reanalysing(agents):
+    debate_graph = graph.create_debate_graph()
+    state = main.stream_graph(debate_graph, new_state())
+    state = main.supervisor_agent.process_user_input(state, "What about storage?")
+    state = main.stream_graph(debate_graph, state)
+
+    assert agents["reader"].calls == 1
+    assert [(arg.position, arg.number) for arg in state.arguments] == [("pro", 1), ("con", 1)]
+    assert state.current_turn == "pro"
+    assert state.iteration_count == 2
+
+def test_verdicts_are_reported_for_every_fact_check(agents):
+    agents["fact_checker"].responses = [
+        "The argument FAILS fact checking: the growth figure is wrong.",
+        "The argument PASSES fact checking.",
+    ]
+    verdicts = []
+    state = main.stream_graph(graph.create_debate_graph(), new_state(), lambda **v: verdicts.append(v))
+
+    assert [(v["position"], v["number"], v["is_verified"]) for v in verdicts] == [
+        ("pro", 1, False),
+        ("pro", 1, True),
+    ]
+    assert "growth figure" in verdicts[0]["feedback"]
+    assert len(state.arguments) == 1 and state.arguments[0].verified
+
+def test_websocket_turn_publishes_verdict_argument_and_state(agents):
+    client = TestClient(main.app)
+    created = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew.\n\nStorage costs fell."
+    })
+    assert created.status_code == 200
+    debate_id = created.json()["debate_id"]
+
+    with client.websocket_connect(f"/debates/{debate_id}/ws") as ws:
+        events = [ws.receive_json() for _ in range(2)]
+        assert [e["type"] for e in events] == ["argument", "turn_complete"]
+
+        ws.send_json({"type": "input", "user_input": "continue"})
+        events = []
+        while not events or events[-1]["type"] != "turn_complete":
+            events.append(ws.receive_json())
+
+    assert [e["type"] for e in events] == ["verdict", "argument", "turn_complete"]
+    assert events[0]["position"] == "con" and events[0]["is_verified"]
+    assert events[1]["position"] == "con" and events[1]["number"] == 1
+    assert events[2]["current_turn"] == "pro" and events[2]["iteration_count"] == 2
+    assert len(main.debate_sessions[debate_id]["state"].arguments) == 2
+    assert agents["reader"].calls == 1
+
+def test_websocket_stays_open_while_a_long_turn_runs(agents, monkeypatch):
+    monkeypatch.setattr(main, "WS_HEARTBEAT_SECONDS", 0.2)
+    monkeypatch.setattr(main, "WS_IDLE_TIMEOUT_SECONDS", 1.0)
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew.\n\nStorage costs fell."
+    }).json()["debate_id"]
+    agents["con"].delay = 2.5
+
+    with client.websocket_connect(f"/debates/{debate_id}/ws?last_event_id=1") as ws:
+        ws.send_json({"type": "input", "user_input": "continue"})
+        # The client only listens; heartbeats keep arriving until the turn ends
+        types = []
+        while not types or types[-1] != "turn_complete":
+            types.append(ws.receive_json()["type"])
+
+    assert "heartbeat" in types
+    assert types[-2:] == ["argument", "turn_complete"]
+
+def test_long_replay_is_sent_rather_than_refused(agents):
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew."
+    }).json()["debate_id"]
+    session = main.debate_sessions[debate_id]
+    for i in range(3 * main.WS_MAX_PENDING_EVENTS):
+        main.publish_event(session, "note", n=i)
+
+    with client.websocket_connect(f"/debates/{debate_id}/ws") as ws:
+        ids = [ws.receive_json()["id"] for _ in range(session["next_event_id"])]
+
+    assert ids == list(range(session["next_event_id"]))
+
+def test_replay_from_a_dropped_event_says_it_was_truncated(agents, monkeypatch):
+    monkeypatch.setattr(main, "WS_EVENT_LOG_SIZE", 10)
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew."
+    }).json()["debate_id"]
+    session = main.debate_sessions[debate_id]
+    for i in range(30):
+        main.publish_event(session, "note", n=i)
+
+    with client.websocket_connect(f"/debates/{debate_id}/ws?last_event_id=0") as ws:
+        first = ws.receive_json()
+        ids = [ws.receive_json()["id"] for _ in range(10)]
+
+    assert len(session["events"]) == 10
+    assert first == {"type": "replay_truncated", "first_event_id": 22}
+    assert ids == list(range(22, 32))
+
+def test_finished_debates_stop_publishing(agents):
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew."
+    }).json()["debate_id"]
+    session = main.debate_sessions[debate_id]
+
+    client.post(f"/debates/{debate_id}/input", json={"debate_id": debate_id, "user_input": "done"})
+    published = session["next_event_id"]
+    for _ in range(3):
+        response = client.post(f"/debates/{debate_id}/input", json={"debate_id": debate_id, "user_input": "done"})
+        assert response.status_code == 200 and not response.json()["is_active"]
+    with client.websocket_connect(f"/debates/{debate_id}/ws?last_event_id={published - 1}") as ws:
+        ws.send_json({"type": "input", "user_input": "continue"})
+        reply = ws.receive_json()
+
+    assert reply["type"] == "error"
+    assert session["next_event_id"] == published
+
+def test_http_input_runs_the_next_turn(agents):
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew.\n\nStorage costs fell."
+    }).json()["debate_id"]
+
+    response = client.post(f"/debates/{debate_id}/input", json={
+        "debate_id": debate_id,
+        "user_input": "What about storage?"
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(arg["position"], arg["number"]) for arg in body["arguments"]] == [("pro", 1), ("con", 1)]
+    assert body["current_turn"] == "pro" and body["iteration_count"] == 2
+    assert main.debate_sessions[debate_id]["state"].user_inputs == ["What about storage?"]
+    assert agents["reader"].calls == 1
+
+def test_concurrent_turns_for_one_debate_are_refused(agents):
+    client = TestClient(main.app)
+    debate_id = client.post("/debates", json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew.\n\nStorage costs fell."
+    }).json()["debate_id"]
+    agents["con"].delay = 0.5
+
+    async def two_turns():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post(f"/debates/{debate_id}/input", json={"debate_id": debate_id, "user_input": text})
+                for text in ("First question", "Second question")
+            ])
+
+    responses = asyncio.run(two_turns())
+
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    state = main.debate_sessions[debate_id]["state"]
+    assert len(state.arguments) == 2 and len(state.user_inputs) == 1
+    assert main.debate_sessions[debate_id]["published_arguments"] == 2
+
+@pytest.mark.parametrize("header", ["0", "-1", "nan", "inf", "soon", ""])
+def test_invalid_request_timeouts_are_rejected(agents, header):
+    response = TestClient(main.app).post("/debates", headers={"X-Request-Timeout": header}, json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew."
+    })
+
+    assert response.status_code == 400
+
+def test_zero_timeout_deadline_expires_immediately():
+    assert Deadline(0).cancelled
+    assert Deadline(None).remaining() is None
+
+def test_failed_create_leaves_no_session(agents):
+    agents["reader"].delay = 0.5
+    sessions = dict(main.debate_sessions)
+
+    response = TestClient(main.app).post("/debates", headers={"X-Request-Timeout": "0.1"}, json={
+        "article_title": "Solar",
+        "article_content": "Solar power grew."
+    })
+
+    assert response.status_code == 504
+    assert main.debate_sessions == sessions
+
+def test_only_llm_nodes_feed_admission_latency(agents, monkeypatch):
+    observed = []
+    monkeypatch.setattr(graph.admission_controller, "observe_node_latency", observed.append)
+
+    run_with_deadline(Deadline(None), main.stream_graph, graph.create_debate_graph(), new_state())
+
+    # analyze_article, generate_pro_argument and fact_check_argument; not the bookkeeping nodes
+    assert len(observed) == 3
+
+def test_nodes_that_make_no_call_do_not_feed_admission_latency(agents, monkeypatch):
+    observed = []
+    monkeypatch.setattr(graph.admission_controller, "observe_node_latency", observed.append)
+    monkeypatch.setattr(graph, "PIPELINED_FACT_CHECK", True)
+    debate_graph = graph.create_debate_graph()
+
+    # The pipelined fact_check_argument only reuses the generation-time verdict
+    state = run_with_deadline(Deadline(None), main.stream_graph, debate_graph, new_state())
+    assert len(observed) == 2
+
+    # A writer at the iteration limit returns without calling its model
+    observed.clear()
+    state.iteration_count = 2
+    state = run_with_deadline(Deadline(None), main.stream_graph, debate_graph, state)
+    assert not state.is_active and observed == []
+
+def test_pipelined_turn_uses_the_generation_time_verdict(agents, monkeypatch):
+    monkeypatch.setattr(graph, "PIPELINED_FACT_CHECK", True)
+    contexts = []
+    verify_text = graph.fact_checker_agent.verify_text
+    monkeypatch.setattr(
+        graph.fact_checker_agent,
+        "verify_text",
+        lambda text, context=None: (contexts.append((text.strip(), context)), verify_text(text, context))[1]
+    )
+    verdicts = []
+
+    state = main.stream_graph(graph.create_debate_graph(), new_state(), lambda **v: verdicts.append(v))
+
+    # One check per paragraph, with the preceding text as context, and no second whole-argument check
+    assert sorted(contexts) == [("It is cheap.", "Solar grew.\n\n"), ("Solar grew.", "")]
+    assert agents["fact_checker"].calls == 2
+    assert [v["is_verified"] for v in verdicts] == [True]
+    assert state.arguments[0].verified and state.precheck is None
+
+def test_segment_verdicts_flag_each_failing_paragraph():
+    checker = graph.fact_checker_agent
+    argument = graph.Argument(content="A.\n\nB.\n\nC.", position="pro", number=1)
+
+    failed, argument = checker.combine_segment_verdicts(
+        argument, [(0, True, "A PASSES"), (1, False, "B FAILS"), (2, False, "C FAILS")]
+    )
+    assert not failed.is_verified and not argument.verified
+    assert [(item.index, item.feedback) for item in failed.failed_paragraphs] == [(1, "B FAILS"), (2, "C FAILS")]
+    assert failed.feedback == "Paragraph 2: B FAILS\n\nParagraph 3: C FAILS"
+
+    passed, argument = checker.combine_segment_verdicts(argument, [(0, True, "A PASSES"), (1, True, "B PASSES")])
+    assert passed.is_verified and argument.verified
+    assert passed.failed_paragraphs == [] and passed.feedback == "A PASSES\n\nB PASSES"
+
+def test_only_failed_paragraphs_are_revised(agents, monkeypatch):
+    monkeypatch.setattr(graph, "PIPELINED_FACT_CHECK", True)
+    agents["pro"].responses = ["Solar grew.\n\nIt is cheap.", "It costs less than coal per kWh."]
+    checks = []
+
+    def verify_text(text, context=None):
+        checks.append((text.strip(), context is not None))
+        if "cheap" in text and context is not None:
+            return False, "Cheap is vague; compare the cost."
+        return True, "PASSES"
+
+    monkeypatch.setattr(graph.fact_checker_agent, "verify_text", verify_text)
+    verdicts = []
+
+    state = main.stream_graph(graph.create_debate_graph(), new_state(), lambda **v: verdicts.append(v))
+
+    assert [v["is_verified"] for v in verdicts] == [False, True]
+    assert verdicts[0]["feedback"] == "Paragraph 2: Cheap is vague; compare the cost."
+    # One streamed argument plus one rewrite of the failing paragraph
+    assert agents["pro"].calls == 2
+    assert state.arguments[0].content == "Solar grew.\n\nIt costs less than coal per kWh."
+    # The revision is then checked as a whole
+    assert checks[-1] == ("Solar grew.\n\nIt costs less than coal per kWh.", False)
+
+def test_claim_index_needs_most_of_a_claim_covered(tmp_path):
+    index = ClaimReviewIndex(str(tmp_path / "claims.db"))
+    index.add_rows([
+        {"review_url": "https://example.org/solar", "text": "Solar power grew twenty percent in 2023"},
+        {"review_url": "https://example.org/wind", "text": "Wind farms kill millions of birds every year"},
+    ])
+
+    unrelated, unmatched = index.search("Power companies grew profits and solar stocks fell")
+    assert unmatched
+
+    related, unmatched = index.search("Solar power grew by twenty percent in 2023, outpacing coal")
+    assert not unmatched
+    assert [claim["claimReview"][0]["url"] for claim in related["claims"]] == ["https://example.org/solar"]
+
+def test_claim_index_matches_claims_late_in_a_long_argument(tmp_path):
+    index = ClaimReviewIndex(str(tmp_path / "claims.db"))
+    index.add_rows([
+        {"review_url": "https://example.org/wind", "text": "Wind farms kill millions of birds every year"},
+    ])
+    filler = " ".join(f"Policy {i} changed grid tariffs in district{i} during quarter{i}." for i in range(20))
+    argument = f"{filler}\n\nCritics say wind farms kill millions of birds every year."
+
+    results, unmatched = index.search(argument)
+
+    assert [claim["claimReview"][0]["url"] for claim in results["claims"]] == ["https://example.org/wind"]
+    # The filler paragraph is split between sentences and none of it matched
+    assert unmatched and all(len(piece) < len(filler) for piece in unmatched)
+    assert "".join(unmatched).startswith("Policy 0")
+
+def test_local_hit_on_one_paragraph_still_queries_the_rest(tmp_path, monkeypatch):
+    index = ClaimReviewIndex(str(tmp_path / "claims.db"))
+    index.add_rows([
+        {"review_url": "https://example.org/wind", "text": "Wind farms kill millions of birds every year"},
+    ])
+    checker = FactCheckerAgent("test", "test", index)
+    queries = []
+    remote_claim = {"text": "Solar panels contain toxic lead", "claimReview": [{"url": "https://example.org/lead"}]}
+
+    def query_remote_api(query):
+        queries.append(query)
+        return {"claims": [remote_claim]}
+
+    monkeypatch.setattr(checker, "query_remote_api", query_remote_api)
+    results = checker.check_facts_with_api(
+        "Wind farms kill millions of birds every year.\n\nSolar panels contain toxic lead."
+    )
+
+    assert queries == ["Solar panels contain toxic lead."]
+    assert [claim["claimReview"][0]["url"] for claim in results["claims"]] == [
+        "https://example.org/wind", "https://example.org/lead"
+    ]
+
+def test_writer_prompt_without_passages_is_the_summary_only_prompt():
+    prompt = graph.pro_writer_agent._argument_prompt("Solar power grew quickly.", [], "", None)
+
+    assert "Article Summary: Solar power grew quickly." in prompt
+    assert "Passages" not in prompt and "passages" not in prompt
+
+def test_writer_context_fits_summary_and_passages_in_the_budget(monkeypatch):
+    monkeypatch.setattr(graph, "PASSAGE_RETRIEVAL", True)
+    paragraphs = [f"Solar output rose in region {i}. Storage costs fell by {i} percent there." for i in range(200)]
+    state = new_state()
+    state.article.content = "\n\n".join(paragraphs)
+    state.summary = " ".join(f"Sentence {i} of a long summary about solar output and storage." for i in range(100))
+
+    summary, evidence = graph.writer_context(state, "What happened to storage costs?")
+
+    assert evidence
+    assert len(summary) < len(state.summary)
+    total = estimate_tokens(summary) + sum(estimate_tokens(passage) for passage in evidence)
+    assert total <= graph.WRITER_CONTEXT_TOKENS
+
+    monkeypatch.setattr(graph, "PASSAGE_RETRIEVAL", False)
+    assert graph.writer_context(state, "What happened to storage costs?") == (state.summary, None)
+
+def test_trimmed_summary_keeps_every_reader_section(monkeypatch):
+    monkeypatch.setattr(graph, "PASSAGE_RETRIEVAL", True)
+    headings = ["1. Summary:", "2. Main stance:", "3. Key claims:", "4. Counterarguments:"]
+    state = new_state()
+    state.article.content = "\n\n".join(f"Storage costs fell by {i} percent in region {i}." for i in range(50))
+    state.summary = "\n\n".join(
+        heading + " " + " ".join(f"Point {i} about solar output and storage costs." for i in range(40))
+        for heading in headings
+    )
+
+    summary, evidence = graph.writer_context(state, "What happened to storage costs?")
+
+    assert estimate_tokens(summary) <= graph.WRITER_SUMMARY_TOKENS
+    assert all(heading in summary for heading in headings)